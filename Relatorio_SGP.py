@@ -1,35 +1,29 @@
 
 import os
-import time
-import shutil
-import zipfile
 import socket
 from dotenv import load_dotenv
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
+from navegador import (criar_driver, download_dir, modo_navegador, pagina_ociosa, pasta_sessao, pasta_temporaria,
+                       sessao_ativa)
+from downloads import receber_download
+from passos import Passos
 
 # ===================== CONFIGURAÇÕES INICIAIS =====================
-load_dotenv()
-LOGIN = os.getenv("USUARIO_SGP")
-SENHA = os.getenv("SENHA_SGP")
-driver_path = "./chromedriver"
 nome_parcial = "cliente-"
 nome_final = "Relatorio_SGP.xlsx"
+ARQUIVOS = [nome_final]
 
-download_dir = os.path.abspath("download")
-if not os.path.exists(download_dir):
-    os.makedirs(download_dir)
-    print(f"[INFO] Pasta de download criada em: {download_dir}")
-else:
-    print(f"[INFO] Usando pasta de download: {download_dir}")
+URL_CLIENTES = "https://sgp.net4you.com.br/admin/cliente/list/"
+CAMPO_LOGIN = (By.ID, "id_username")
+ABA_TAG = (By.ID, "ui-id-2")
 
-if not LOGIN or not SENHA:
-    print("[ERRO] USUARIO_SGP ou SENHA_SGP não definidos no .env")
-    exit(1)
+# Opção que o select2 destaca depois de buscar o texto digitado
+OPCAO_DESTACADA = (By.CSS_SELECTOR, ".select2-results__option--highlighted")
+# A consulta de clientes negativados pode levar muitos minutos para liberar a exportação
+ESPERA_EXPORTACAO = 1440
 
 def verificar_porta_localhost(porta, timeout=2):
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
@@ -37,113 +31,96 @@ def verificar_porta_localhost(porta, timeout=2):
         resultado = sock.connect_ex(('localhost', porta))
         return resultado == 0
 
-if not verificar_porta_localhost(48589):
-    print("[AVISO] Serviço local na porta 48589 não está ativo ou demorando para responder.")
-
-def esperar_download_e_renomear():
-    print("[INFO] Aguardando download do arquivo...")
-    timeout = 600
-    polling = 2
-    tempo_inicio = time.time()
-
-    while time.time() - tempo_inicio < timeout:
-        arquivos = os.listdir(download_dir)
-        em_progresso = [f for f in arquivos if f.endswith(".crdownload")]
-        finalizados = [f for f in arquivos if f.startswith(nome_parcial) and f.endswith(".xlsx")]
-
-        if em_progresso:
-            print("[INFO] Download em andamento...")
-        elif finalizados:
-            original_path = os.path.join(download_dir, finalizados[0])
-            destino_path = os.path.join(download_dir, nome_final)
+def exportar(pasta=None):
+    # Baixa a lista de clientes com a TAG NEGATIVADO e devolve o caminho do Relatorio_SGP.xlsx
+    load_dotenv()
+    login = os.getenv("USUARIO_SGP")
+    senha = os.getenv("SENHA_SGP")
+    if not login or not senha:
+        raise RuntimeError("USUARIO_SGP ou SENHA_SGP não definidos no .env")
+
+    pasta = pasta or download_dir
+    temporaria = pasta_temporaria("sgp", pasta)
+    print(f"[INFO] Usando pasta de download: {pasta}")
+
+    if not verificar_porta_localhost(48589):
+        print("[AVISO] Serviço local na porta 48589 não está ativo ou demorando para responder.")
+
+    print("[INFO] Iniciando Chrome...")
+    sessao = pasta_sessao("sgp")
+    passos = Passos("SGP", modo_navegador())
+    with passos.medir("navegador"):
+        driver = criar_driver(temporaria, sessao=sessao, argumentos=[
+            "--disable-extensions",
+            "--disable-gpu",
+            "--no-sandbox",
+            "--disable-software-rasterizer",
+            "--disable-dev-shm-usage"
+        ])
+    wait = WebDriverWait(driver, 20)
 
+    try:
+        with passos.medir("abertura"):
+            print("[INFO] Acessando o SGP...")
+            driver.get(URL_CLIENTES)
+            # Com a sessão salva, a lista de clientes abre direto, sem o formulário
+            reaproveitada = sessao is not None and sessao_ativa(driver, ABA_TAG, CAMPO_LOGIN)
+        if reaproveitada:
+            print("[INFO] Sessão anterior reaproveitada.")
+        else:
+            with passos.medir("login"):
+                print("[INFO] Realizando login...")
+                campo_login = wait.until(EC.presence_of_element_located(CAMPO_LOGIN))
+                campo_senha = wait.until(EC.presence_of_element_located((By.NAME, "password")))
+                botao_entrar = wait.until(EC.element_to_be_clickable((By.ID, "entrar")))
+
+                campo_login.send_keys(login)
+                campo_senha.send_keys(senha)
+                botao_entrar.click()
+                print("[INFO] Login concluído.")
+
+        with passos.medir("filtro"):
+            print("[INFO] Abrindo aba de TAGs...")
+            aba_tag = wait.until(EC.element_to_be_clickable(ABA_TAG))
+            aba_tag.click()
+
+            print("[INFO] Selecionando TAG NEGATIVADO...")
+            campo_tag = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, '.select2-search__field')))
+            campo_tag.click()
+            campo_tag.send_keys("NEGATIVADO")
+            # Só confirma quando o select2 terminou de buscar e destacou a TAG
+            wait.until(EC.text_to_be_present_in_element(OPCAO_DESTACADA, "NEGATIVADO"))
+            campo_tag.send_keys(Keys.ENTER)
+
+        with passos.medir("consulta"):
+            print("[INFO] Executando consulta...")
+            botao_consulta = wait.until(EC.element_to_be_clickable((By.ID, "botao_consulta")))
+            botao_consulta.click()
+
+            print("[INFO] Aguardando resultados...")
+            WebDriverWait(driver, ESPERA_EXPORTACAO).until(pagina_ociosa)
+
+            print(f"[INFO] Aguardando botão de exportação (até {ESPERA_EXPORTACAO}s)...")
             try:
-                with zipfile.ZipFile(original_path, 'r') as zip_ref:
-                    if zip_ref.testzip() is not None:
-                        raise zipfile.BadZipFile("Erro ao ler conteúdo interno.")
-            except zipfile.BadZipFile:
-                print("[ERRO] Arquivo .xlsx baixado está corrompido. Aguardando novo download...")
-                time.sleep(polling)
-                continue
-
-            if os.path.getsize(original_path) < 10240:
-                print("[ERRO] Arquivo baixado é muito pequeno. Aguardando novo download...")
-                time.sleep(polling)
-                continue
-
-            shutil.move(original_path, destino_path)
-            print(f"[SUCESSO] Arquivo baixado e renomeado para: {destino_path}")
-            return True
-
-        time.sleep(polling)
-
-    print("[ERRO] Tempo excedido esperando download.")
-    return False
-
-print("[INFO] Iniciando Chrome...")
-service = Service(driver_path)
-options = webdriver.ChromeOptions()
-prefs = {"download.default_directory": download_dir}
-options.add_experimental_option("prefs", prefs)
-options.add_argument("--disable-extensions")
-options.add_argument("--disable-gpu")
-options.add_argument("--no-sandbox")
-options.add_argument("--disable-software-rasterizer")
-options.add_argument("--disable-dev-shm-usage")
-
-driver = webdriver.Chrome(service=service, options=options)
-driver.maximize_window()
-wait = WebDriverWait(driver, 20)
-
-try:
-    print("[INFO] Acessando o SGP...")
-    driver.get("https://sgp.net4you.com.br/admin/cliente/list/")
-
-    print("[INFO] Realizando login...")
-    campo_login = wait.until(EC.presence_of_element_located((By.ID, "id_username")))
-    campo_senha = wait.until(EC.presence_of_element_located((By.NAME, "password")))
-    botao_entrar = wait.until(EC.element_to_be_clickable((By.ID, "entrar")))
-
-    campo_login.send_keys(LOGIN)
-    campo_senha.send_keys(SENHA)
-    botao_entrar.click()
-    print("[INFO] Login concluído.")
-
-    print("[INFO] Abrindo aba de TAGs...")
-    aba_tag = wait.until(EC.element_to_be_clickable((By.ID, "ui-id-2")))
-    aba_tag.click()
-
-    print("[INFO] Selecionando TAG NEGATIVADO...")
-    campo_tag = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, '.select2-search__field')))
-    campo_tag.click()
-    campo_tag.send_keys("NEGATIVADO")
-    time.sleep(2)
-    campo_tag.send_keys(Keys.ENTER)
-
-    print("[INFO] Executando consulta...")
-    botao_consulta = wait.until(EC.element_to_be_clickable((By.ID, "botao_consulta")))
-    botao_consulta.click()
-
-    print("[INFO] Aguardando resultados...")
-    time.sleep(5)
-
-    print("[INFO] Aguardando botão de exportação (até 1440s)...")
+                botao_excel = WebDriverWait(driver, ESPERA_EXPORTACAO).until(EC.element_to_be_clickable((By.ID, "idprintexcel")))
+                botao_excel.click()
+                print("[SUCESSO] Botão de exportação clicado.")
+            except Exception as e:
+                print(f"[ERRO] Timeout ao aguardar botão Excel: {e}")
+                raise
+
+        with passos.medir("download"):
+            # .xlsx íntegro e com pelo menos 10 KB (o SGP às vezes entrega a planilha vazia)
+            return [receber_download(temporaria, pasta, nome_final, f"{nome_parcial}*.xlsx",
+                                     timeout=600, tamanho_minimo=10240)]
+
+    finally:
+        driver.quit()
+        print("[INFO] Navegador encerrado.")
+        passos.gravar()
+
+if __name__ == "__main__":
     try:
-        botao_excel = WebDriverWait(driver, 1440).until(EC.element_to_be_clickable((By.ID, "idprintexcel")))
-        botao_excel.click()
-        print("[SUCESSO] Botão de exportação clicado.")
+        exportar()
     except Exception as e:
-        print(f"[ERRO] Timeout ao aguardar botão Excel: {e}")
-        raise
-
-    if not esperar_download_e_renomear():
-        raise Exception("Download não finalizado corretamente.")
-
-    input("[INFO] Pressione Enter para encerrar...")
-
-except Exception as e:
-    print(f"[ERRO] Ocorreu um erro: {e}")
-
-finally:
-    driver.quit()
-    print("[INFO] Navegador encerrado.")
+        print(f"[ERRO] Ocorreu um erro: {e}")
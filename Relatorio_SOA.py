@@ -1,162 +1,158 @@
 import os
-import time
 from dotenv import load_dotenv, dotenv_values
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from navegador import (clicar_ate, criar_driver, download_dir, modo_navegador, pagina_ociosa, pasta_sessao,
+                       pasta_temporaria, salvar_pagina, sessao_ativa)
+from downloads import receber_download
+from passos import Passos
 
 # ==== Configurações iniciais ====
 
 dotenv_path = os.path.join(os.path.dirname(__file__), ".env")
-load_dotenv(dotenv_path)
-config = dotenv_values(dotenv_path)
-print("[DEBUG] Conteúdo carregado do .env:", config)
-
-LOGIN = config.get("USUARIO_SOA")
-SENHA = config.get("SENHA_SOA")
-
-if not LOGIN or not SENHA:
-    print("[ERRO] Variáveis USUARIO_SOA ou SENHA_SOA não estão definidas no .env ou estão vazias.")
-    print(f"[DEBUG] USUARIO_SOA = {LOGIN}")
-    print(f"[DEBUG] SENHA_SOA = {'<vazio>' if not SENHA else '***'}")
-    exit(1)
-
-driver_path = "./chromedriver"
-download_dir = os.path.abspath("download")
-os.makedirs(download_dir, exist_ok=True)
-
-chrome_options = Options()
-chrome_options.add_experimental_option("prefs", {
-    "download.default_directory": download_dir,
-    "download.prompt_for_download": False,
-    "directory_upgrade": True,
-    "safebrowsing.enabled": True
-})
-
-driver = webdriver.Chrome(service=Service(driver_path), options=chrome_options)
-driver.maximize_window()
-wait = WebDriverWait(driver, 15)
-
-def aguardar_download(pasta, timeout=120):
-    print("[INFO] Aguardando novo arquivo .csv na pasta de download...")
-    arquivos_antes = set(os.listdir(pasta))
-    limite = time.time() + timeout
-
-    while time.time() < limite:
-        arquivos_agora = set(os.listdir(pasta))
-        novos = [f for f in arquivos_agora - arquivos_antes if f.endswith(".csv")]
-        if novos:
-            arquivo_final = os.path.join(pasta, novos[0])
-            print(f"[INFO] Novo arquivo detectado: {arquivo_final}")
-            return arquivo_final
-        time.sleep(1)
-
-    raise TimeoutError("[ERRO] Nenhum novo arquivo .csv detectado após exportação.")
-
-def realizar_login():
+
+ABAS = [
+    ("btn_Responsaveis", "Ativas.csv"),
+    ("btn_Financeiro", "Baixadas.csv"),
+    ("btn_Cobranca", "Pendentes.csv"),
+    ("btn_NFSe", "Determinacao.csv"),
+    ("href_Erros", "Erros.csv")
+]
+ARQUIVOS = [nome_saida for _, nome_saida in ABAS]
+
+URL_VISAO_GERAL = "https://portal.soawebservices.com.br/Negativacoes/VisaoGeral"
+CAMPO_EMAIL = (By.ID, "Email")
+BOTAO_RESPONSAVEIS = (By.ID, "btn_Responsaveis")
+
+# Indicador de carregamento das grades (Syncfusion) do portal
+CARREGANDO_GRADE = (By.CSS_SELECTOR, ".e-spin-show")
+
+def realizar_login(driver, wait, login, senha, passos, sessao=None):
     print("[INFO] Acessando página de login...")
-    driver.get("https://portal.soawebservices.com.br/Negativacoes/VisaoGeral")
+    with passos.medir("abertura"):
+        driver.get(URL_VISAO_GERAL)
+        # Com a sessão salva, a visão geral abre direto, sem o formulário
+        reaproveitada = sessao is not None and sessao_ativa(driver, BOTAO_RESPONSAVEIS, CAMPO_EMAIL)
+    if reaproveitada:
+        print("[INFO] Sessão anterior reaproveitada.")
+        return
 
     try:
-        campo_email = wait.until(EC.visibility_of_element_located((By.ID, "Email")))
-        campo_email.send_keys(LOGIN)
-        print("[INFO] Campo de e-mail preenchido.")
+        with passos.medir("login"):
+            campo_email = wait.until(EC.visibility_of_element_located(CAMPO_EMAIL))
+            campo_email.send_keys(login)
+            print("[INFO] Campo de e-mail preenchido.")
 
-        campo_senha = wait.until(EC.visibility_of_element_located((By.ID, "Senha")))
-        campo_senha.send_keys(SENHA)
-        print("[INFO] Campo de senha preenchido.")
+            campo_senha = wait.until(EC.visibility_of_element_located((By.ID, "Senha")))
+            campo_senha.send_keys(senha)
+            print("[INFO] Campo de senha preenchido.")
 
-        botao_login_seguro = wait.until(EC.element_to_be_clickable((By.ID, "js-login-btn")))
-        time.sleep(1)
-        botao_login_seguro.click()
-        print("[INFO] Botão 'LoginSeguro' clicado.")
+            # O clique só vale depois que os scripts da página terminam de carregar
+            botao_login_seguro = wait.until(EC.element_to_be_clickable((By.ID, "js-login-btn")))
+            wait.until(pagina_ociosa)
+            botao_login_seguro.click()
+            print("[INFO] Botão 'LoginSeguro' clicado.")
 
-        wait.until(EC.presence_of_element_located((By.ID, "btn_Responsaveis")))
-        print("[INFO] Login realizado com sucesso.")
+            wait.until(EC.presence_of_element_located(BOTAO_RESPONSAVEIS))
+            print("[INFO] Login realizado com sucesso.")
 
     except Exception as e:
         print("[ERRO] Falha no processo de login:", e)
-        with open("pagina_login_erro.html", "w", encoding="utf-8") as f:
-            f.write(driver.page_source)
+        salvar_pagina(driver, "pagina_login_erro.html")
         print("[DEBUG] HTML salvo como 'pagina_login_erro.html'.")
         raise
 
-def clicar_exportar_csv(botao_id, nome_saida):
-    print(f"[INFO] Acessando aba '{botao_id}' com duplo clique...")
+def localizador_exportar(botao_id, nome_saida):
+    # Mapeamento dos botões de exportação por aba
+    if botao_id == "btn_Financeiro":
+        return (By.ID, "GridNegativacoesBaixadas_csvexport")
+    elif botao_id == "btn_Cobranca":
+        return (By.ID, "GridNegativacoesPendentes_csvexport")
+    elif botao_id == "btn_NFSe" and nome_saida == "Determinacao.csv":
+        return (By.ID, "GridNegativacoesRecusadas_csvexport")
+    elif botao_id == "href_Erros":
+        return (By.ID, "GridNegativacoesErros_csvexport")
+    return (
+        By.XPATH,
+        "//span[text()='Exportar em CSV']/ancestor::button | //span[text()='Exportar em CSV']/ancestor::*[contains(@class, 'e-tbar-btn')]"
+    )
+
+def clicar_exportar_csv(driver, wait, botao_id, nome_saida, temporaria, pasta, passos):
+    nome = os.path.splitext(nome_saida)[0]
+    print(f"[INFO] Acessando aba '{botao_id}'...")
     try:
-        # Tratar aba "Erros" sem ID específico
-        if botao_id == "href_Erros":
-            aba = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, 'a[href="#tab_Erros"]')))
-        else:
-            aba = wait.until(EC.element_to_be_clickable((By.ID, botao_id)))
-        aba.click()
-        time.sleep(1)
-        aba.click()
-        print(f"[INFO] Aba '{botao_id}' clicada duas vezes.")
-
-        print("[INFO] Aguardando carregamento da aba...")
-        time.sleep(2)
-
-        print("[INFO] Procurando botão 'Exportar em CSV'...")
-
-        # Mapeamento dos botões de exportação por aba
-        if botao_id == "btn_Financeiro":
-            botao_exportar = wait.until(EC.element_to_be_clickable((By.ID, "GridNegativacoesBaixadas_csvexport")))
-        elif botao_id == "btn_Cobranca":
-            botao_exportar = wait.until(EC.element_to_be_clickable((By.ID, "GridNegativacoesPendentes_csvexport")))
-        elif botao_id == "btn_NFSe" and nome_saida == "Determinacao.csv":
-            botao_exportar = wait.until(EC.element_to_be_clickable((By.ID, "GridNegativacoesRecusadas_csvexport")))
-        elif botao_id == "href_Erros":
-            botao_exportar = wait.until(EC.element_to_be_clickable((By.ID, "GridNegativacoesErros_csvexport")))
-        else:
-            botao_exportar = wait.until(EC.element_to_be_clickable((
-                By.XPATH,
-                "//span[text()='Exportar em CSV']/ancestor::button | //span[text()='Exportar em CSV']/ancestor::*[contains(@class, 'e-tbar-btn')]"
-            )))
-
-        driver.execute_script("arguments[0].style.border='2px solid red'", botao_exportar)
-
-        try:
-            botao_exportar.click()
-        except Exception:
-            driver.execute_script("arguments[0].click();", botao_exportar)
-
-        print("[INFO] Botão 'Exportar em CSV' clicado.")
-
-        arquivo = aguardar_download(download_dir, timeout=120)
-        destino = os.path.join(download_dir, nome_saida)
-        os.rename(arquivo, destino)
-        print(f"[INFO] Arquivo renomeado para: {destino}")
+        with passos.medir(f"aba:{nome}"):
+            # Tratar aba "Erros" sem ID específico
+            if botao_id == "href_Erros":
+                aba = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, 'a[href="#tab_Erros"]')))
+            else:
+                aba = wait.until(EC.element_to_be_clickable((By.ID, botao_id)))
+
+            # A aba às vezes só ativa no segundo clique: repete se o botão não aparecer
+            localizador = localizador_exportar(botao_id, nome_saida)
+            clicar_ate(driver, aba, EC.visibility_of_element_located(localizador))
+            print(f"[INFO] Aba '{botao_id}' aberta.")
+
+            print("[INFO] Aguardando carregamento da grade...")
+            wait.until(pagina_ociosa)
+            wait.until(EC.invisibility_of_element_located(CARREGANDO_GRADE))
+
+            print("[INFO] Procurando botão 'Exportar em CSV'...")
+            botao_exportar = wait.until(EC.element_to_be_clickable(localizador))
+
+            driver.execute_script("arguments[0].style.border='2px solid red'", botao_exportar)
+
+            try:
+                botao_exportar.click()
+            except Exception:
+                driver.execute_script("arguments[0].click();", botao_exportar)
+
+            print("[INFO] Botão 'Exportar em CSV' clicado.")
+
+        with passos.medir(f"download:{nome}"):
+            return receber_download(temporaria, pasta, nome_saida, "*.csv", timeout=120)
 
     except Exception as e:
         print(f"[ERRO] Falha ao exportar aba '{botao_id}':", e)
-        with open(f"pagina_{botao_id}_erro.html", "w", encoding="utf-8") as f:
-            f.write(driver.page_source)
+        salvar_pagina(driver, f"pagina_{botao_id}_erro.html")
         print(f"[DEBUG] HTML salvo como 'pagina_{botao_id}_erro.html'.")
         raise
 
 # ===== Execução principal =====
 
-try:
-    realizar_login()
-
-    abas = [
-        ("btn_Responsaveis", "Ativas.csv"),
-        ("btn_Financeiro", "Baixadas.csv"),
-        ("btn_Cobranca", "Pendentes.csv"),
-        ("btn_NFSe", "Determinacao.csv"),
-        ("href_Erros", "Erros.csv")
-    ]
+def exportar(pasta=None):
+    # Exporta as cinco abas do SOA em uma sessão e devolve os caminhos dos CSVs
+    load_dotenv(dotenv_path)
+    config = dotenv_values(dotenv_path)
+    login = config.get("USUARIO_SOA")
+    senha = config.get("SENHA_SOA")
+
+    if not login or not senha:
+        print(f"[DEBUG] USUARIO_SOA = {login}")
+        print(f"[DEBUG] SENHA_SOA = {'<vazio>' if not senha else '***'}")
+        raise RuntimeError("Variáveis USUARIO_SOA ou SENHA_SOA não estão definidas no .env ou estão vazias.")
+
+    pasta = pasta or download_dir
+    temporaria = pasta_temporaria("soa", pasta)
+    sessao = pasta_sessao("soa")
+    passos = Passos("SOA", modo_navegador())
+    with passos.medir("navegador"):
+        driver = criar_driver(temporaria, sessao=sessao)
+    wait = WebDriverWait(driver, 15)
 
-    for aba_id, nome_saida in abas:
-        clicar_exportar_csv(aba_id, nome_saida)
+    try:
+        realizar_login(driver, wait, login, senha, passos, sessao)
+        return [clicar_exportar_csv(driver, wait, aba_id, nome_saida, temporaria, pasta, passos)
+                for aba_id, nome_saida in ABAS]
 
-except Exception as e:
-    print(f"[ERRO GERAL] {e}")
+    finally:
+        driver.quit()
+        passos.gravar()
 
-finally:
-    driver.quit()
+if __name__ == "__main__":
+    try:
+        exportar()
+    except Exception as e:
+        print(f"[ERRO GERAL] {e}")
     print("[INFO] Processo concluído.")
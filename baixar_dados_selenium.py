@@ -0,0 +1,174 @@
+import argparse
+import io
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import metricas
+import Relatorio_CNM
+import Relatorio_SGP
+import Relatorio_SOA
+
+# Roda as exportações do CNM, SGP e SOA ao mesmo tempo, cada uma no próprio
+# Chrome (no máximo --navegadores abertos, todos ligados ao mesmo chromedriver), mostra o andamento de cada portal
+# e, enquanto os outros ainda baixam, já lê os arquivos de quem terminou; a
+# conciliação começa assim que chega o último arquivo.
+
+PORTAIS = {
+    # nome: módulo exportador (exportar(pasta) -> caminhos baixados)
+    'CNM': Relatorio_CNM,
+    'SGP': Relatorio_SGP,
+    'SOA': Relatorio_SOA,
+}
+
+# Mostra o andamento pelo menos a cada tantos segundos
+INTERVALO_PROGRESSO = 30
+
+
+class SaidaPorPortal(io.TextIOBase):
+    # Prefixa com o portal cada linha impressa pela thread de um exportador,
+    # para as mensagens dos três não se misturarem no console
+    def __init__(self, saida):
+        self.saida = saida
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def write(self, texto):
+        # Junta os pedaços de cada print e escreve só linhas completas
+        portal = getattr(self.local, 'portal', None)
+        prefixo = f'[{portal}] ' if portal else ''
+        *linhas, self.local.pendente = (getattr(self.local, 'pendente', '') + texto).split('\n')
+        if linhas:
+            self.escrever(prefixo + f'\n{prefixo}'.join(linhas))
+        return len(texto)
+
+    def escrever(self, linha):
+        # Sem prefixo (ex.: o andamento geral, impresso de qualquer thread)
+        with self.lock:
+            self.saida.write(linha + '\n')
+            self.saida.flush()
+
+    def flush(self):
+        pendente = getattr(self.local, 'pendente', '')
+        if pendente:
+            self.local.pendente = ''
+            with self.lock:
+                self.saida.write(pendente)
+        self.saida.flush()
+
+
+class Progresso:
+    def __init__(self, portais, saida):
+        self.saida = saida
+        self.lock = threading.Lock()
+        self.estado = {portal: ['na fila', None, None] for portal in portais}  # situação, início, fim
+
+    def mudar(self, portal, situacao):
+        with self.lock:
+            registro = self.estado[portal]
+            registro[0] = situacao
+            if situacao == 'baixando':
+                registro[1] = time.perf_counter()
+            else:
+                registro[2] = time.perf_counter()
+        self.mostrar()
+
+    def mostrar(self):
+        agora = time.perf_counter()
+        partes = []
+        with self.lock:
+            for portal, (situacao, inicio, fim) in self.estado.items():
+                if inicio is None:
+                    partes.append(f'{portal}: {situacao}')
+                else:
+                    partes.append(f'{portal}: {situacao} ({(fim or agora) - inicio:.0f}s)')
+        self.saida.escrever(f"[PROGRESSO] {' | '.join(partes)}")
+
+
+def exportar_portal(portal, pasta, progresso, saida):
+    saida.local.portal = portal
+    progresso.mudar(portal, 'baixando')
+    try:
+        with metricas.etapa(f'download:{portal}'):
+            caminhos = PORTAIS[portal].exportar(pasta)
+    except BaseException:
+        progresso.mudar(portal, 'falhou')
+        raise
+    finally:
+        saida.local.portal = None
+    progresso.mudar(portal, 'concluído')
+    return caminhos
+
+
+def baixar(portais, navegadores, pasta=None, dashboard=True):
+    inicio = time.perf_counter()
+    saida = SaidaPorPortal(sys.stdout)
+    sys.stdout = saida
+    residente = None
+    if dashboard:
+        from dashboard_residente import DashboardResidente
+        residente = DashboardResidente()
+    try:
+        progresso = Progresso(portais, saida)
+        falhas = []
+        with ThreadPoolExecutor(max_workers=navegadores, thread_name_prefix='exportador') as executor:
+            tarefas = {executor.submit(exportar_portal, portal, pasta, progresso, saida): portal for portal in portais}
+            pendentes = set(tarefas)
+            while pendentes:
+                prontas, pendentes = wait(pendentes, timeout=INTERVALO_PROGRESSO, return_when=FIRST_COMPLETED)
+                if not prontas:
+                    progresso.mostrar()
+                for tarefa in prontas:
+                    portal = tarefas[tarefa]
+                    try:
+                        caminhos = tarefa.result()
+                    except Exception as e:
+                        print(f'[ERRO] {portal}: {type(e).__name__}: {e}')
+                        falhas.append(portal)
+                        continue
+                    if residente is not None:
+                        # Lê já os arquivos deste portal, enquanto os outros baixam
+                        residente.carregar_caminhos(caminhos)
+
+        if falhas:
+            print(f"[ERRO] Download interrompido: {', '.join(falhas)}. Dashboard não gerado.")
+            metricas.registrar_execucao('falha', time.perf_counter() - inicio)
+            return False
+        print(f'[SUCESSO] Downloads concluídos em {time.perf_counter() - inicio:.1f}s.')
+        if residente is None:
+            metricas.registrar_execucao('sucesso', time.perf_counter() - inicio)
+            return True
+        # Portais fora desta execução entram com os arquivos que já estão na pasta
+        faltantes = [fonte for fonte in residente.fontes_por_caminho().values() if fonte[0] not in residente.quadros]
+        if faltantes and not residente.carregar(faltantes):
+            print('[ERRO] Falha ao ler os arquivos de entrada; dashboard não gerado.')
+            metricas.registrar_execucao('falha', time.perf_counter() - inicio)
+            return False
+        return residente.gerar(inicio)
+    finally:
+        sys.stdout = saida.saida
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Baixa os relatórios do CNM, SGP e SOA em paralelo e gera o dashboard.')
+    parser.add_argument('--portais', nargs='+', choices=list(PORTAIS), default=list(PORTAIS),
+                        help='portais a baixar (padrão: todos)')
+    parser.add_argument('--navegadores', type=int, default=len(PORTAIS),
+                        help=f'Chromes abertos ao mesmo tempo (padrão: {len(PORTAIS)})')
+    parser.add_argument('--sem-dashboard', action='store_true',
+                        help='só baixa os arquivos, sem gerar o dashboard')
+    parser.add_argument('--manter-sessao', action='store_true',
+                        help='guarda o perfil do Chrome de cada portal em ./sessoes e só faz login se a sessão expirou')
+    parser.add_argument('--visivel', action='store_true',
+                        help='abre o Chrome com janela e página completa (padrão: headless, sem imagens e fontes)')
+    args = parser.parse_args()
+
+    if args.manter_sessao:
+        os.environ['MANTER_SESSAO'] = '1'
+    if args.visivel:
+        os.environ['NAVEGADOR_VISIVEL'] = '1'
+
+    metricas.iniciar('baixar_dados')
+    if not baixar(args.portais, max(1, args.navegadores), dashboard=not args.sem_dashboard):
+        sys.exit(1)
@@ -0,0 +1,150 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import pandas as pd
+import gerar_dashboard as gd
+import metricas
+from conciliacao import juntar_fontes, conciliar_juncao
+from dados_sinteticos import gerar_dados_sinteticos, TAMANHOS
+from escritores import escrever_excel
+from regras_status import classificar_status
+
+# Mede as etapas da geração sobre os dados de dados_sinteticos.py e compara
+# com a linha de base gravada em benchmarks/baseline.json (por tamanho).
+#   python benchmark.py --tamanho 100k --salvar-baseline   grava a referência
+#   python benchmark.py --tamanho 100k                     compara; sai com 1 se regrediu
+
+sintetico_dir = './sintetico'
+arquivo_baseline = './benchmarks/baseline.json'
+
+REPETICOES = 3
+# Regressão = tempo acima da linha de base por mais que esta fração e por
+# mais que estes segundos (casos de poucos milissegundos oscilam demais)
+TOLERANCIA = 0.25
+FOLGA_SEGUNDOS = 0.05
+
+
+def preparar(tamanho):
+    # Gera os dados uma vez por tamanho e aponta o gerar_dashboard para eles
+    pasta = os.path.join(sintetico_dir, tamanho)
+    gd.caminho_dir = os.path.join(pasta, 'download')
+    gd.caminho_cnm = os.path.join(gd.caminho_dir, 'Relatorio_CNM.xlsx')
+    gd.caminho_sgp = os.path.join(gd.caminho_dir, 'Relatorio_SGP.xlsx')
+    gd.saida_dir = os.path.join(pasta, 'output')
+    os.makedirs(gd.saida_dir, exist_ok=True)
+    if not os.path.exists(gd.caminho_sgp):
+        gerar_dados_sinteticos(gd.caminho_dir, TAMANHOS[tamanho])
+    # As métricas do benchmark não se misturam às da produção
+    metricas.metricas_dir = os.path.join(pasta, 'metricas')
+    metricas.iniciar('benchmark')
+
+
+# Nomes dos casos de casos(), na ordem em que são medidos
+CASOS = ['carregar_dados', 'classificar_status', 'conciliar', 'escrever_excel', 'gerar_html', 'gerar_dashboard']
+
+
+def casos(cnm_df, sgp_df, soa_df):
+    juncao = juntar_fontes(cnm_df, sgp_df, soa_df)
+    df = conciliar_juncao(juncao)
+    presentes = [juncao[('presente', fonte)].to_numpy() for fonte in ('cnm', 'soa', 'sgp')]
+    return {
+        'carregar_dados': lambda: gd.carregar_dados(usar_cache=False, workers=1),
+        'classificar_status': lambda: classificar_status(*presentes, juncao['cnm']['Tipo'], juncao['soa']['fonte']),
+        'conciliar': lambda: conciliar_juncao(juntar_fontes(cnm_df, sgp_df, soa_df)),
+        'escrever_excel': lambda: escrever_excel(df, os.path.join(gd.saida_dir, 'resultado_unificado.xlsx')),
+        'gerar_html': lambda: gd.gerar_html(df),
+        'gerar_dashboard': lambda: gd.processar(cnm_df, sgp_df, soa_df),
+    }
+
+
+def medir(funcao, repeticoes):
+    # Melhor tempo de N execuções; a saída dos scripts é descartada
+    tempos = []
+    for _ in range(repeticoes):
+        with contextlib.redirect_stdout(io.StringIO()):
+            inicio = time.perf_counter()
+            funcao()
+            tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def carregar_baseline():
+    try:
+        with open(arquivo_baseline, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def salvar_baseline(tamanho, resultados):
+    # Casos medidos substituem os anteriores; os demais (--casos) são mantidos
+    baseline = carregar_baseline()
+    tempos = {**baseline.get(tamanho, {}).get('tempos_s', {}), **resultados}
+    baseline[tamanho] = {
+        'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'tempos_s': tempos
+    }
+    os.makedirs(os.path.dirname(arquivo_baseline), exist_ok=True)
+    with open(arquivo_baseline, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2)
+    print(f'[INFO] Linha de base "{tamanho}" gravada em {arquivo_baseline}')
+
+
+def comparar(tamanho, resultados, tolerancia):
+    referencia = carregar_baseline().get(tamanho, {}).get('tempos_s')
+    if not referencia:
+        print(f'[ERRO] Sem linha de base para "{tamanho}" em {arquivo_baseline}; use --salvar-baseline.')
+        return False
+    ok = True
+    for nome, tempo in resultados.items():
+        base = referencia.get(nome)
+        if base is None:
+            print(f'[AVISO] {nome}: sem linha de base')
+            continue
+        variacao = tempo / base - 1
+        if variacao > tolerancia and tempo - base > FOLGA_SEGUNDOS:
+            ok = False
+            print(f'[ERRO] {nome}: {base:.3f}s -> {tempo:.3f}s ({variacao:+.0%}) acima da tolerância de {tolerancia:.0%}')
+        else:
+            print(f'[INFO] {nome}: {base:.3f}s -> {tempo:.3f}s ({variacao:+.0%})')
+    return ok
+
+
+def executar(tamanho, repeticoes, selecionados=None):
+    preparar(tamanho)
+    with contextlib.redirect_stdout(io.StringIO()):
+        cnm_df, sgp_df, soa_df = gd.carregar_dados(usar_cache=False, workers=1)
+    resultados = {}
+    for nome, funcao in casos(cnm_df, sgp_df, soa_df).items():
+        if selecionados and nome not in selecionados:
+            continue
+        resultados[nome] = round(medir(funcao, repeticoes), 4)
+        print(f'[BENCH] {tamanho} {nome}: {resultados[nome]:.3f}s')
+    return resultados
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark da geração do dashboard com dados sintéticos.')
+    parser.add_argument('--tamanho', choices=list(TAMANHOS), default='10k')
+    parser.add_argument('--repeticoes', type=int, default=REPETICOES,
+                        help=f'execuções por caso; vale o melhor tempo (padrão: {REPETICOES})')
+    parser.add_argument('--casos', nargs='+', metavar='CASO', choices=CASOS,
+                        help='mede só estes casos (ex.: carregar_dados gerar_html)')
+    parser.add_argument('--salvar-baseline', action='store_true',
+                        help=f'grava os tempos como linha de base em {arquivo_baseline}')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA,
+                        help=f'fração de piora aceita antes de acusar regressão (padrão: {TOLERANCIA})')
+    args = parser.parse_args()
+
+    resultados = executar(args.tamanho, args.repeticoes, args.casos)
+    if args.salvar_baseline:
+        salvar_baseline(args.tamanho, resultados)
+    elif not comparar(args.tamanho, resultados, args.tolerancia):
+        sys.exit(1)
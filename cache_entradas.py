@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+import pandas as pd
+
+# Cache dos quadros já normalizados, em Parquet, um arquivo por
+# (fonte, versão do leitor, hash do conteúdo do arquivo de entrada).
+cache_dir = './cache'
+LIMITE_CACHE_MB = 512
+
+
+def parquet_disponivel():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def hash_arquivo(caminho):
+    h = hashlib.blake2b(digest_size=16)
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def hash_com_memoria(nome, caminho):
+    # Evita reler o arquivo inteiro quando tamanho e mtime não mudaram
+    stat = os.stat(caminho)
+    memo_path = os.path.join(cache_dir, f'{nome}.hash.json')
+    try:
+        with open(memo_path, encoding='utf-8') as f:
+            memo = json.load(f)
+        if memo['caminho'] == os.path.abspath(caminho) and memo['tamanho'] == stat.st_size and memo['mtime_ns'] == stat.st_mtime_ns:
+            return memo['hash']
+    except (OSError, ValueError, KeyError):
+        pass
+
+    conteudo = hash_arquivo(caminho)
+    temp_path = memo_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({'caminho': os.path.abspath(caminho), 'tamanho': stat.st_size,
+                   'mtime_ns': stat.st_mtime_ns, 'hash': conteudo}, f)
+    os.replace(temp_path, memo_path)
+    return conteudo
+
+
+def limpar_cache(limite_mb=LIMITE_CACHE_MB):
+    # Remove os sidecars usados há mais tempo até caber no limite. Vários
+    # workers podem limpar ao mesmo tempo: um arquivo que sumiu entre o
+    # listdir e o stat/remove já foi removido por outro e só é pulado
+    sidecars = []
+    for nome in os.listdir(cache_dir):
+        if nome.endswith('.parquet'):
+            try:
+                stat = os.stat(os.path.join(cache_dir, nome))
+            except FileNotFoundError:
+                continue
+            sidecars.append((stat.st_mtime, stat.st_size, nome))
+    total = sum(tamanho for _, tamanho, _ in sidecars)
+    for _, tamanho, nome in sorted(sidecars):
+        if total <= limite_mb * 1024 * 1024:
+            break
+        total -= tamanho
+        try:
+            os.remove(os.path.join(cache_dir, nome))
+        except FileNotFoundError:
+            continue
+        print(f'[CACHE] Removido {nome} (limite de {limite_mb} MB).')
+
+
+def carregar_com_cache(nome, caminho, leitor, versao, usar_cache=True):
+    if not usar_cache or not parquet_disponivel():
+        return leitor(caminho)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    chave = f'{nome}-v{versao}-{hash_com_memoria(nome, caminho)}'
+    sidecar = os.path.join(cache_dir, chave + '.parquet')
+
+    if os.path.exists(sidecar):
+        try:
+            df = pd.read_parquet(sidecar)
+            os.utime(sidecar)
+            print(f'[CACHE] {nome} carregado do cache ({len(df)} linhas).')
+            return df
+        except Exception as e:
+            print(f'[AVISO] Cache de {nome} ilegível, relendo o arquivo: {e}')
+            os.remove(sidecar)
+
+    df = leitor(caminho)
+    temp_path = sidecar + '.tmp'
+    try:
+        df.to_parquet(temp_path, index=False)
+        os.replace(temp_path, sidecar)
+        limpar_cache()
+    except Exception as e:
+        print(f'[AVISO] Não foi possível gravar o cache de {nome}: {e}')
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return df
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+# Chave inteira de documento (CPF/CNPJ já só com dígitos) em um uint64:
+# os 8 bits altos guardam a quantidade de dígitos e os 56 bits baixos o
+# valor numérico, então "0123" e "123" geram chaves diferentes. Documentos
+# com mais de 16 dígitos não cabem; recebem um hash com comprimento 0xFF e
+# o texto original fica guardado em _DOCUMENTOS_LONGOS para a volta (e vai
+# junto com o quadro em df.attrs['documentos_longos'], ver anexar_documentos_longos).
+
+BITS_VALOR = 56
+MASCARA_VALOR = (1 << BITS_VALOR) - 1
+MAX_DIGITOS = 16
+COMPRIMENTO_LONGO = 0xFF
+
+_DOCUMENTOS_LONGOS = {}
+
+PESOS_CPF_1 = np.arange(10, 1, -1)
+PESOS_CPF_2 = np.arange(11, 1, -1)
+PESOS_CNPJ_1 = np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+PESOS_CNPJ_2 = np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+
+
+def empacotar_documentos(documentos):
+    documentos = pd.Series(documentos, dtype=object).fillna('').astype(str)
+    comprimentos = documentos.str.len().to_numpy(dtype=np.uint64)
+    cabe = comprimentos <= MAX_DIGITOS
+
+    valores = pd.to_numeric(documentos.where(cabe & (comprimentos > 0), '0')).to_numpy(dtype=np.uint64)
+    chaves = (comprimentos << np.uint64(BITS_VALOR)) | valores
+
+    if not cabe.all():
+        longos = documentos[~cabe]
+        hashes = pd.util.hash_array(longos.to_numpy(dtype=object)) & np.uint64(MASCARA_VALOR)
+        chaves_longas = (np.uint64(COMPRIMENTO_LONGO) << np.uint64(BITS_VALOR)) | hashes
+        _DOCUMENTOS_LONGOS.update(zip(chaves_longas.tolist(), longos.tolist()))
+        chaves[~cabe] = chaves_longas
+    return chaves
+
+
+def anexar_documentos_longos(df, coluna='chave'):
+    # Leva o texto dos documentos longos junto com o quadro (sobrevive ao
+    # cache Parquet e ao retorno dos processos de leitura)
+    chaves = df[coluna].to_numpy(dtype=np.uint64)
+    longas = np.unique(chaves[comprimentos_documentos(chaves) == COMPRIMENTO_LONGO]).tolist()
+    df.attrs['documentos_longos'] = {str(c): _DOCUMENTOS_LONGOS[c] for c in longas}
+    return df
+
+
+def registrar_documentos_longos(df):
+    _DOCUMENTOS_LONGOS.update((int(c), d) for c, d in df.attrs.get('documentos_longos', {}).items())
+
+
+def comprimentos_documentos(chaves):
+    return (np.asarray(chaves, dtype=np.uint64) >> np.uint64(BITS_VALOR)).astype(np.int64)
+
+
+def desempacotar_documentos(chaves):
+    chaves = np.asarray(chaves, dtype=np.uint64)
+    comprimentos = comprimentos_documentos(chaves)
+    valores = pd.Series((chaves & np.uint64(MASCARA_VALOR)).astype(np.int64))
+    documentos = np.empty(len(chaves), dtype=object)
+    for comprimento in np.unique(comprimentos):
+        selecao = comprimentos == comprimento
+        if comprimento == 0:
+            documentos[selecao] = ''
+        elif comprimento == COMPRIMENTO_LONGO:
+            documentos[selecao] = [_DOCUMENTOS_LONGOS.get(c, f'#{c:x}') for c in chaves[selecao].tolist()]
+        else:
+            documentos[selecao] = valores[selecao].astype(str).str.zfill(int(comprimento)).to_numpy()
+    return documentos
+
+
+def _digitos(valores, comprimento):
+    potencias = 10 ** np.arange(comprimento - 1, -1, -1, dtype=np.int64)
+    return (valores[:, None] // potencias) % 10
+
+
+def _digito_verificador(digitos, pesos):
+    resto = (digitos * pesos).sum(axis=1) % 11
+    return np.where(resto < 2, 0, 11 - resto)
+
+
+def validar_documentos(chaves):
+    # True para CPF (11 dígitos) ou CNPJ (14 dígitos) com dígitos verificadores
+    # corretos e que não sejam um único dígito repetido
+    chaves = np.asarray(chaves, dtype=np.uint64)
+    comprimentos = comprimentos_documentos(chaves)
+    valores = (chaves & np.uint64(MASCARA_VALOR)).astype(np.int64)
+    validos = np.zeros(len(chaves), dtype=bool)
+
+    for comprimento, pesos_1, pesos_2 in [(11, PESOS_CPF_1, PESOS_CPF_2), (14, PESOS_CNPJ_1, PESOS_CNPJ_2)]:
+        selecao = comprimentos == comprimento
+        if not selecao.any():
+            continue
+        digitos = _digitos(valores[selecao], comprimento)
+        dv1 = _digito_verificador(digitos[:, :-2], pesos_1)
+        dv2 = _digito_verificador(digitos[:, :-1], pesos_2)
+        repetido = (digitos == digitos[:, :1]).all(axis=1)
+        validos[selecao] = (digitos[:, -2] == dv1) & (digitos[:, -1] == dv2) & ~repetido
+    return validos
+
+
+def avisar_documentos_invalidos(nome, chaves):
+    invalidos = np.unique(np.asarray(chaves, dtype=np.uint64)[~validar_documentos(chaves)])
+    if len(invalidos):
+        exemplos = ', '.join(repr(d) for d in desempacotar_documentos(invalidos[:5]))
+        print(f'[AVISO] {len(invalidos)} documento(s) com CPF/CNPJ inválido em {nome} (ex.: {exemplos}).')
+    return len(invalidos)
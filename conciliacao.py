@@ -0,0 +1,185 @@
+import numpy as np
+import pandas as pd
+from chave_documento import desempacotar_documentos
+from datas import formatar_datas
+from regras_status import classificar_status
+
+COLUNAS_SAIDA = ["ID", "Documento", "Nome", "Data", "Tipo", "Local", "Status"]
+
+ORIGENS = ['CNM', 'SOA', 'SGP']
+
+# Local é guardado como código de 3 bits (um por origem) e só vira HTML na saída
+PRESENCA_CNM = 1
+PRESENCA_SOA = 2
+PRESENCA_SGP = 4
+
+
+def montar_local(presente_cnm, presente_soa, presente_sgp):
+    # Gera o HTML "CNM | SOA | SGP" com verde/vermelho para cada presença
+    partes = []
+    for origem, presente in zip(ORIGENS, [presente_cnm, presente_soa, presente_sgp]):
+        verde = f"<span style='color:green'>{origem}</span>"
+        vermelho = f"<span style='color:red'>{origem}</span>"
+        partes.append(np.where(presente, verde, vermelho).astype(object))
+    return partes[0] + " | " + partes[1] + " | " + partes[2]
+
+
+_CODIGOS = np.arange(8)
+LOCAIS_HTML = montar_local(_CODIGOS & PRESENCA_CNM > 0, _CODIGOS & PRESENCA_SOA > 0, _CODIGOS & PRESENCA_SGP > 0)
+
+
+def codificar_local(presente_cnm, presente_soa, presente_sgp):
+    return (np.asarray(presente_cnm) * PRESENCA_CNM
+            | np.asarray(presente_soa) * PRESENCA_SOA
+            | np.asarray(presente_sgp) * PRESENCA_SGP).astype(np.uint8)
+
+
+def renderizar_saida(df):
+    # Converte o código de presença em HTML e as datas em texto para gravar Excel/HTML
+    saida = df.copy(deep=False)
+    saida['Data'] = formatar_datas(df['Data'])
+    saida['Local'] = LOCAIS_HTML[df['Local'].to_numpy()]
+    return saida
+
+
+def _tipo_categorico(presente_cnm, presente_soa, tipo_cnm, fonte_soa):
+    # Tipo é o Tipo do CNM, senão a fonte do SOA, senão "-"; montado pelos códigos
+    tipo_cnm = tipo_cnm.astype('category')
+    fonte_soa = fonte_soa.astype('category')
+    categorias = list(dict.fromkeys([*tipo_cnm.cat.categories, *fonte_soa.cat.categories, '-']))
+    codigos = np.where(presente_cnm, tipo_cnm.cat.set_categories(categorias).cat.codes,
+                       np.where(presente_soa, fonte_soa.cat.set_categories(categorias).cat.codes,
+                                categorias.index('-')))
+    return pd.Categorical.from_codes(codigos, categories=categorias)
+
+
+def juntar_fontes(cnm_df, sgp_df, soa_df):
+    # Junção por documento (chave de chave_documento) de todas as fontes, em
+    # uma passada, ordenada pela chave; a primeira ocorrência de cada fonte
+    # vence. Base da visão unificada e das visões CNM x SGP e SOA x SGP
+    # (que usa só as linhas da fonte Ativas do SOA).
+    soa_ativas = soa_df[soa_df['fonte'] == 'Ativas'] if 'fonte' in soa_df else soa_df.iloc[:0]
+    primeiros = {
+        'cnm': cnm_df.drop_duplicates('chave', keep='first').set_index('chave'),
+        'soa': soa_df.drop_duplicates('chave', keep='first').set_index('chave'),
+        'sgp': sgp_df.drop_duplicates('chave', keep='first').set_index('chave'),
+        'ativas': soa_ativas.drop_duplicates('chave', keep='first').set_index('chave')
+    }
+    documentos = primeiros['cnm'].index.union(primeiros['soa'].index).union(primeiros['sgp'].index).sort_values()
+
+    juncao = pd.concat({fonte: df.reindex(documentos) for fonte, df in primeiros.items()}, axis=1)
+    for fonte, df in primeiros.items():
+        juncao[('presente', fonte)] = documentos.isin(df.index)
+    if 'Unique ID' in soa_df:
+        tem_id = soa_df['Unique ID'].notna().groupby(soa_df['chave']).any()
+        juncao[('soa', 'tem_id')] = tem_id.reindex(documentos, fill_value=False).to_numpy()
+    return juncao
+
+
+def conciliar_juncao(juncao):
+    documentos = juncao.index
+    presente_cnm = juncao[('presente', 'cnm')].to_numpy()
+    presente_soa = juncao[('presente', 'soa')].to_numpy()
+    presente_sgp = juncao[('presente', 'sgp')].to_numpy()
+
+    cnm = juncao['cnm']
+    soa = juncao['soa']
+
+    tipo = _tipo_categorico(presente_cnm, presente_soa, cnm['Tipo'], soa['fonte'])
+    # A reindexação devolve object quando a fonte está vazia; to_datetime acerta o tipo
+    data_cnm = pd.to_datetime(cnm['Data / Hora']).to_numpy(dtype='datetime64[ns]')
+    data_soa = pd.to_datetime(soa['data']) if 'data' in soa else pd.Series(pd.NaT, index=soa.index)
+    data = np.where(presente_cnm, data_cnm,
+                    np.where(presente_soa, data_soa.to_numpy(dtype='datetime64[ns]'), np.datetime64('NaT')))
+    nome = np.where(presente_soa, soa['devedor'].to_numpy(dtype=object), "-")
+
+    if 'tem_id' in soa:
+        id_val = np.where(soa['tem_id'].to_numpy(dtype=bool), soa['Unique ID'].to_numpy(dtype=object), "-")
+    else:
+        id_val = np.full(len(documentos), "-", dtype=object)
+
+    return pd.DataFrame({
+        "ID": id_val,
+        "Documento": desempacotar_documentos(documentos.to_numpy()),
+        "Nome": nome,
+        "Data": data,
+        "Tipo": tipo,
+        "Local": codificar_local(presente_cnm, presente_soa, presente_sgp),
+        "Status": classificar_status(presente_cnm, presente_soa, presente_sgp, cnm['Tipo'], soa['fonte'])
+    }, columns=COLUNAS_SAIDA)
+
+
+def conciliar(cnm_df, sgp_df, soa_df):
+    return conciliar_juncao(juntar_fontes(cnm_df, sgp_df, soa_df))
+
+
+def determinar_status(presente_sgp, tipo, fontes):
+    tipo = tipo.strip().upper()
+    if tipo == "INCLUSAO":
+        return "NEGATIVADO" if presente_sgp else "ERRO"
+    elif tipo == "EXCLUSAO":
+        return "ERRO" if presente_sgp else "BAIXADO"
+    else:
+        return "ERRO"
+
+
+def conciliar_por_documento(cnm_df, sgp_df, soa_df):
+    # Conciliação por documento (um filtro por documento), usada por
+    # verificar_conciliacao() sobre os arquivos reais; é O(documentos x linhas).
+    # A cópia fiel do laço original fica em tests/test_conciliacao.py.
+    documentos = set(cnm_df['chave']) | set(soa_df['chave']) | set(sgp_df['chave'])
+
+    dados = []
+    for doc in documentos:
+        row_cnm = cnm_df[cnm_df['chave'] == doc]
+        row_sgp = sgp_df[sgp_df['chave'] == doc]
+        row_soa = soa_df[soa_df['chave'] == doc]
+
+        presente_sgp = not row_sgp.empty
+        fontes = list(row_soa['fonte'].unique()) if not row_soa.empty else []
+
+        if not row_cnm.empty:
+            tipo = row_cnm['Tipo'].values[0]
+            data = pd.to_datetime(row_cnm['Data / Hora'].values[0], dayfirst=True)
+            data = data.strftime('%d/%m/%Y %H:%M') if pd.notna(data) else "-"
+            fontes.append('CNM' if tipo == 'INCLUSAO' else 'CNM_EXCLUSAO')
+        elif not row_soa.empty:
+            tipo = row_soa['fonte'].values[0]
+            # Datas do SOA agora também são datas de verdade, formatadas na saída
+            data = pd.to_datetime(row_soa['data'].values[0], dayfirst=True)
+            data = data.strftime('%d/%m/%Y %H:%M') if pd.notna(data) else "-"
+        else:
+            tipo = "-"
+            data = "-"
+
+        nome = row_soa['devedor'].values[0] if not row_soa.empty else "-"
+        id_val = row_soa['Unique ID'].values[0] if 'Unique ID' in row_soa and not row_soa['Unique ID'].isnull().all() else "-"
+
+        local = " | ".join([
+            f"<span style='color:{'green' if not row.empty else 'red'}'>{origem}</span>"
+            for origem, row in [('CNM', row_cnm), ('SOA', row_soa), ('SGP', row_sgp)]
+        ])
+
+        status = determinar_status(presente_sgp, tipo, fontes)
+
+        dados.append({
+            "ID": id_val,
+            "Documento": doc,
+            "Nome": nome,
+            "Data": data,
+            "Tipo": tipo,
+            "Local": local,
+            "Status": status
+        })
+
+    df = pd.DataFrame(dados, columns=COLUNAS_SAIDA)
+    df['Documento'] = desempacotar_documentos(df['Documento'].to_numpy(dtype=np.uint64))
+    return df
+
+
+def verificar_conciliacao(cnm_df, sgp_df, soa_df):
+    print('[INFO] Verificando conciliação contra a implementação por documento...')
+    esperado = conciliar_por_documento(cnm_df, sgp_df, soa_df).sort_values('Documento', ignore_index=True)
+    obtido = renderizar_saida(conciliar(cnm_df, sgp_df, soa_df)).sort_values('Documento', ignore_index=True)
+    pd.testing.assert_frame_equal(obtido.astype(object), esperado.astype(object), check_dtype=False)
+    print(f'[SUCESSO] Conciliação idêntica para {len(obtido)} documentos.')
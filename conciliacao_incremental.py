@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import pickle
+import uuid
+import numpy as np
+import pandas as pd
+from conciliacao import juntar_fontes, conciliar, conciliar_juncao
+from regras_status import REGRAS_STATUS
+
+# Estado da última execução: versão, identificador da execução, assinatura
+# por documento de cada fonte e o resultado unificado correspondente (com a
+# chave uint64 de cada linha), em um único arquivo trocado de uma vez. Ao lado, saidas.json diz de qual
+# execução são as saídas gravadas (e o tamanho/mtime de cada uma).
+estado_dir = './estado'
+caminho_estado = os.path.join(estado_dir, 'estado.pkl')
+caminho_saidas = os.path.join(estado_dir, 'saidas.json')
+
+# Colunas que influenciam o resultado de cada fonte (primeira linha vence)
+COLUNAS_CNM = ['Tipo', 'Data / Hora']
+COLUNAS_SOA = ['fonte', 'data', 'devedor', 'Unique ID']
+# Muda quando o conteúdo do estado.pkl muda (2: chaves ao lado do resultado)
+FORMATO_ESTADO = 2
+
+
+def versao_estado(versao_leitores):
+    regras = hashlib.blake2b(repr(REGRAS_STATUS).encode('utf-8'), digest_size=8).hexdigest()
+    return f'{FORMATO_ESTADO}-{versao_leitores}-{regras}'
+
+
+def _assinar_primeiras(df, chave, colunas):
+    primeiras = df.drop_duplicates(chave, keep='first')
+    colunas = [c for c in colunas if c in primeiras]
+    hashes = pd.util.hash_pandas_object(primeiras[colunas].astype(str), index=False)
+    return pd.Series(hashes.to_numpy(), index=primeiras[chave].to_numpy())
+
+
+def calcular_assinaturas(cnm_df, sgp_df, soa_df):
+    # Hash por documento de tudo o que conciliar() usa daquele documento;
+    # 0 indica documento ausente na fonte.
+    h_cnm = _assinar_primeiras(cnm_df, 'chave', COLUNAS_CNM)
+    h_soa = _assinar_primeiras(soa_df, 'chave', COLUNAS_SOA)
+    if 'Unique ID' in soa_df:
+        # conciliar() também depende de existir algum Unique ID no documento
+        tem_id = soa_df['Unique ID'].notna().groupby(soa_df['chave']).any()
+        h_soa = h_soa + tem_id.reindex(h_soa.index).astype('uint64')
+    h_sgp = pd.Series(1, index=pd.unique(sgp_df['chave']), dtype='uint64')
+
+    # reindex com fill_value mantém uint64 (sem passar por float64 e perder bits)
+    documentos = h_cnm.index.union(h_soa.index).union(h_sgp.index)
+    return pd.DataFrame({
+        'cnm': h_cnm.reindex(documentos, fill_value=0),
+        'soa': h_soa.reindex(documentos, fill_value=0),
+        'sgp': h_sgp.reindex(documentos, fill_value=0)
+    }).astype('uint64')
+
+
+def carregar_estado(versao):
+    # Devolve (execução, assinaturas, resultado, chaves) ou (None, None, None, None)
+    try:
+        estado = pd.read_pickle(caminho_estado)
+        if estado['versao'] != versao:
+            print('[AVISO] Estado incremental de outra versão dos leitores/regras. Refazendo tudo.')
+            return None, None, None, None
+        return estado['execucao'], estado['assinaturas'], estado['resultado'], estado['chaves']
+    except (OSError, ValueError, KeyError, EOFError, pickle.UnpicklingError) as e:
+        print(f'[AVISO] Estado incremental indisponível ({e}). Refazendo tudo.')
+        return None, None, None, None
+
+
+def salvar_estado(versao, assinaturas, resultado, chaves):
+    # Um arquivo só, gravado em .tmp e trocado: uma interrupção deixa o
+    # estado anterior inteiro, nunca assinaturas novas com resultado antigo
+    execucao = uuid.uuid4().hex
+    os.makedirs(estado_dir, exist_ok=True)
+    temporario = caminho_estado + '.tmp'
+    pd.to_pickle({'versao': versao, 'execucao': execucao, 'assinaturas': assinaturas, 'resultado': resultado,
+                  'chaves': chaves}, temporario)
+    os.replace(temporario, caminho_estado)
+    return execucao
+
+
+def _assinar_saidas(caminhos):
+    assinaturas = {}
+    for caminho in caminhos:
+        try:
+            info = os.stat(caminho)
+        except OSError:
+            return None
+        assinaturas[caminho] = [info.st_size, info.st_mtime_ns]
+    return assinaturas
+
+
+def saidas_conferem(execucao, caminhos):
+    # As saídas existem, foram gravadas a partir deste estado e não foram
+    # regravadas depois (ex.: por uma execução sem --incremental)
+    try:
+        with open(caminho_saidas, encoding='utf-8') as f:
+            registro = json.load(f)
+    except (OSError, ValueError):
+        return False
+    atuais = _assinar_saidas(caminhos)
+    return execucao is not None and registro.get('execucao') == execucao and registro.get('saidas') == atuais
+
+
+def registrar_saidas(execucao, caminhos):
+    temporario = caminho_saidas + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump({'execucao': execucao, 'saidas': _assinar_saidas(caminhos)}, f)
+    os.replace(temporario, caminho_saidas)
+
+
+def documentos_alterados(anteriores, atuais):
+    anteriores, atuais = anteriores.align(atuais, join='outer', fill_value=0)
+    return anteriores.index[(anteriores != atuais).any(axis=1)]
+
+
+def conciliar_incremental(cnm_df, sgp_df, soa_df, versao_leitores, completo=False):
+    # Devolve o resultado, quantos documentos mudaram e o identificador do estado
+    versao = versao_estado(versao_leitores)
+    assinaturas = calcular_assinaturas(cnm_df, sgp_df, soa_df)
+
+    execucao, anteriores, resultado, chaves = (None, None, None, None) if completo else carregar_estado(versao)
+    if resultado is None:
+        print('[INFO] Conciliação completa (estado incremental será recriado).')
+        juncao = juntar_fontes(cnm_df, sgp_df, soa_df)
+        resultado = conciliar_juncao(juncao)
+        return resultado, len(resultado), salvar_estado(versao, assinaturas, resultado, juncao.index.to_numpy())
+
+    alterados = documentos_alterados(anteriores, assinaturas)
+    print(f'[INFO] Conciliação incremental: {len(alterados)} documento(s) alterado(s).')
+    if len(alterados) == 0:
+        return resultado, 0, execucao
+
+    juncao = juntar_fontes(
+        cnm_df[cnm_df['chave'].isin(alterados)],
+        sgp_df[sgp_df['chave'].isin(alterados)],
+        soa_df[soa_df['chave'].isin(alterados)]
+    )
+    # As chaves salvas com o resultado evitam reempacotar a coluna Documento
+    mantidos = ~np.isin(chaves, alterados.to_numpy())
+    resultado = pd.concat([resultado[mantidos], conciliar_juncao(juncao)], ignore_index=True)
+    chaves = np.concatenate([chaves[mantidos], juncao.index.to_numpy()])
+    ordem = np.argsort(chaves, kind='stable')
+    resultado = resultado.iloc[ordem].reset_index(drop=True)
+    chaves = chaves[ordem]
+    # concat de categorias diferentes volta para object
+    resultado['Tipo'] = resultado['Tipo'].astype('category')
+    resultado['Status'] = resultado['Status'].astype('category')
+    return resultado, len(alterados), salvar_estado(versao, assinaturas, resultado, chaves)
+
+
+def verificar_incremental(resultado, cnm_df, sgp_df, soa_df):
+    print('[INFO] Verificando resultado incremental contra a conciliação completa...')
+    completo = conciliar(cnm_df, sgp_df, soa_df)
+    pd.testing.assert_frame_equal(resultado.reset_index(drop=True).astype(object),
+                                  completo.reset_index(drop=True).astype(object), check_dtype=False)
+    print(f'[SUCESSO] Resultado incremental idêntico para {len(resultado)} documentos.')
@@ -0,0 +1,150 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from chave_documento import PESOS_CPF_1, PESOS_CPF_2, PESOS_CNPJ_1, PESOS_CNPJ_2, _digito_verificador
+
+# Gera um conjunto de entradas fictícias no formato dos arquivos reais
+# (Relatorio_CNM.xlsx, Relatorio_SGP.xlsx com as 8 linhas de preâmbulo e os
+# cinco CSVs do SOA com o cabeçalho +ACI-/entidades HTML e a coluna
+# Documento repetida), para medir o desempenho sem dados de clientes.
+
+FONTES_SOA = {
+    # nome: (peso, coluna de data)
+    'Ativas': (0.5, 'Data Inclus&atilde;o'),
+    'Baixadas': (0.25, 'Data Exclus&atilde;o'),
+    'Pendentes': (0.1, 'Data Inclus&atilde;o'),
+    'Determinacao': (0.1, 'Data Inclus&atilde;o'),
+    'Erros': (0.05, 'Data Inclus&atilde;o'),
+}
+
+TAMANHOS = {'10k': 10_000, '100k': 100_000, '1M': 1_000_000}
+
+
+def gerar_documentos(rng, n, fracao_cnpj=0.3, taxa_invalidos=0.02):
+    # CPF/CNPJ com dígitos verificadores corretos, exceto uma fração inválida
+    cnpj = rng.random(n) < fracao_cnpj
+    documentos = pd.Series('', index=range(n), dtype=object)
+    for comprimento, pesos_1, pesos_2, selecao in [(11, PESOS_CPF_1, PESOS_CPF_2, ~cnpj),
+                                                   (14, PESOS_CNPJ_1, PESOS_CNPJ_2, cnpj)]:
+        quantidade = int(selecao.sum())
+        digitos = rng.integers(0, 10, size=(quantidade, comprimento - 2))
+        digitos = np.column_stack([digitos, _digito_verificador(digitos, pesos_1)])
+        digitos = np.column_stack([digitos, _digito_verificador(digitos, pesos_2)])
+        invalidos = rng.random(quantidade) < taxa_invalidos
+        digitos[invalidos, -1] = (digitos[invalidos, -1] + 1) % 10
+        valores = (digitos * 10 ** np.arange(comprimento - 1, -1, -1, dtype=np.int64)).sum(axis=1)
+        documentos[selecao] = pd.Series(valores).astype(str).str.zfill(comprimento).to_numpy()
+    return documentos
+
+
+def formatar_documentos(documentos, rng, fracao_sem_mascara=0.1):
+    cpf = documentos.str.len() == 11
+    mascarados = documentos.where(
+        ~cpf,
+        documentos.str[:3] + '.' + documentos.str[3:6] + '.' + documentos.str[6:9] + '-' + documentos.str[9:])
+    mascarados = mascarados.where(
+        cpf,
+        documentos.str[:2] + '.' + documentos.str[2:5] + '.' + documentos.str[5:8] + '/' + documentos.str[8:12]
+        + '-' + documentos.str[12:])
+    return mascarados.where(rng.random(len(documentos)) >= fracao_sem_mascara, documentos)
+
+
+def gerar_datas(rng, n, formato, inicio='2023-01-01', dias=730, taxa_erro=0.0):
+    segundos = rng.integers(0, dias * 86400, size=n)
+    datas = (pd.Timestamp(inicio) + pd.to_timedelta(segundos, unit='s')).strftime(formato).to_numpy(dtype=object)
+    erradas = rng.random(n) < taxa_erro
+    datas[erradas] = rng.choice(np.array(['', 'data inválida', '31/02/2024'], dtype=object), size=int(erradas.sum()))
+    return datas
+
+
+def _escrever_xlsx(caminho, cabecalho, colunas, preambulo=()):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Sheet1')
+    for linha in preambulo:
+        ws.append(linha)
+    ws.append(cabecalho)
+    for linha in zip(*colunas):
+        ws.append(linha)
+    wb.save(caminho)
+
+
+def gerar_dados_sinteticos(pasta, documentos=10_000, presenca_cnm=0.6, presenca_soa=0.5, presenca_sgp=0.3,
+                           sobreposicao=0.9, taxa_erro=0.02, taxa_duplicadas=0.02, semente=1):
+    # sobreposicao: chance de o SGP concordar com o Tipo do CNM (INCLUSAO no SGP,
+    # EXCLUSAO fora dele); presenca_sgp vale para quem não está no CNM.
+    # taxa_erro: documentos inválidos, Tipos fora do padrão e datas ilegíveis.
+    rng = np.random.default_rng(semente)
+    os.makedirs(pasta, exist_ok=True)
+    docs = gerar_documentos(rng, documentos, taxa_invalidos=taxa_erro)
+
+    # CNM
+    no_cnm = rng.random(documentos) < presenca_cnm
+    tipos = np.where(rng.random(documentos) < 0.6, 'INCLUSAO', 'EXCLUSAO').astype(object)
+    estranhos = rng.random(documentos) < taxa_erro
+    tipos[estranhos] = rng.choice(np.array(['INCLUSAO ', 'OUTRO'], dtype=object), size=int(estranhos.sum()))
+    indices_cnm = np.flatnonzero(no_cnm)
+    indices_cnm = np.concatenate([indices_cnm, rng.choice(indices_cnm, size=int(len(indices_cnm) * taxa_duplicadas))]) \
+        if len(indices_cnm) else indices_cnm
+    cnm = formatar_documentos(docs[indices_cnm].reset_index(drop=True), rng)
+    _escrever_xlsx(
+        os.path.join(pasta, 'Relatorio_CNM.xlsx'),
+        ['Id', 'Documento', 'Tipo', 'Data / Hora', 'Usuário'],
+        [range(1, len(cnm) + 1), cnm, tipos[indices_cnm],
+         gerar_datas(rng, len(cnm), '%d/%m/%Y %H:%M:%S', taxa_erro=taxa_erro),
+         rng.choice(np.array(['operador1', 'operador2', 'integracao'], dtype=object), size=len(cnm))])
+
+    # SGP: concorda com o CNM com probabilidade "sobreposicao"
+    concorda = rng.random(documentos) < sobreposicao
+    esperado = tipos == 'INCLUSAO'
+    no_sgp = np.where(no_cnm, np.where(concorda, esperado, ~esperado), rng.random(documentos) < presenca_sgp)
+    indices_sgp = np.flatnonzero(no_sgp)
+    sgp = formatar_documentos(docs[indices_sgp].reset_index(drop=True), rng)
+    _escrever_xlsx(
+        os.path.join(pasta, 'Relatorio_SGP.xlsx'),
+        ['Código', 'CPF/CNPJ', 'Nome/Razão Social', 'Cidade'],
+        [range(1, len(sgp) + 1), sgp, [f'Cliente {i}' for i in indices_sgp],
+         rng.choice(np.array(['São Paulo', 'Curitiba', 'Recife'], dtype=object), size=len(sgp))],
+        preambulo=[['Relatório de Clientes'], ['Emitido em: 01/01/2025'], [], ['Filtros:'], ['Situação: Todos'],
+                   [], ['Total de registros:', len(sgp)], []])
+
+    # SOA: cada documento presente cai em uma fonte e tem 1 a 3 linhas de histórico
+    no_soa = np.flatnonzero(rng.random(documentos) < presenca_soa)
+    pesos = np.array([p for p, _ in FONTES_SOA.values()])
+    fonte = rng.choice(len(FONTES_SOA), size=len(no_soa), p=pesos / pesos.sum())
+    repeticoes = rng.geometric(0.6, size=len(no_soa)).clip(max=3)
+    for i, (nome, (_, coluna_data)) in enumerate(FONTES_SOA.items()):
+        indices = np.repeat(no_soa[fonte == i], repeticoes[fonte == i])
+        n = len(indices)
+        unique_id = np.array([f'U{v}' for v in rng.integers(10 ** 5, 10 ** 7, size=n)], dtype=object)
+        unique_id[rng.random(n) < 0.2] = ''
+        soa = pd.DataFrame({
+            '+ACI-Unique ID+ACI-': unique_id,
+            '+ACI-Documento+ACI-': formatar_documentos(docs[indices].reset_index(drop=True), rng),
+            '+ACI-Devedor+ACI-': [f'Devedor {d}' for d in docs[indices]],
+            f'+ACI-{coluna_data}+ACI-': gerar_datas(rng, n, '%d/%m/%Y', taxa_erro=taxa_erro),
+            '+ACI-Valor+ACI-': rng.integers(1000, 500000, size=n) / 100,
+        })
+        # A exportação real repete a coluna Documento (documento do credor)
+        soa.insert(len(soa.columns), '+ACI-Documento+ACI-.dup', '00000000000191')
+        soa.to_csv(os.path.join(pasta, f'{nome}.csv'), index=False, encoding='utf-8',
+                   header=[c.removesuffix('.dup') for c in soa.columns])
+
+    print(f'[INFO] Dados sintéticos em {pasta}: {documentos} documentos, {len(cnm)} linhas CNM, '
+          f'{len(sgp)} linhas SGP, {int(repeticoes.sum())} linhas SOA.')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Gera entradas fictícias no formato de CNM, SGP e SOA.')
+    parser.add_argument('pasta', help='pasta de saída (ex.: ./sintetico/10k)')
+    parser.add_argument('--documentos', default='10k',
+                        help=f'quantidade de documentos ({", ".join(TAMANHOS)} ou um número)')
+    parser.add_argument('--sobreposicao', type=float, default=0.9,
+                        help='chance de o SGP concordar com o Tipo do CNM (padrão: 0.9)')
+    parser.add_argument('--taxa-erro', type=float, default=0.02,
+                        help='fração de documentos inválidos, Tipos fora do padrão e datas ilegíveis (padrão: 0.02)')
+    parser.add_argument('--semente', type=int, default=1)
+    args = parser.parse_args()
+    gerar_dados_sinteticos(args.pasta, TAMANHOS.get(args.documentos) or int(args.documentos),
+                           sobreposicao=args.sobreposicao, taxa_erro=args.taxa_erro, semente=args.semente)
@@ -0,0 +1,90 @@
+import os
+import time
+import gerar_dashboard as gd
+import metricas
+
+# Modo residente do monitor: o processo importa pandas/openpyxl uma vez e
+# mantém em memória os quadros normalizados de cada fonte. A cada lote de
+# arquivos alterados só essas fontes são relidas; depois a conciliação e as
+# saídas rodam de novo sobre os quadros em memória. Fontes cuja leitura
+# falhou ficam em `falhas` (mantendo o quadro anterior, se houver) e são
+# relidas no próximo lote, mesmo que o arquivo delas não tenha mudado.
+
+
+def _normalizar(caminho):
+    return os.path.normcase(os.path.abspath(caminho))
+
+
+class DashboardResidente:
+    def __init__(self, usar_cache=True, **opcoes):
+        self.usar_cache = usar_cache
+        self.opcoes = opcoes
+        self.quadros = {}
+        self.falhas = set()
+
+    def fontes_por_caminho(self, avisar=True):
+        return {_normalizar(caminho): (nome, caminho, leitor) for nome, caminho, leitor in gd.listar_fontes(avisar)}
+
+    def carregar(self, fontes):
+        with metricas.etapa('leitura'):
+            quadros, falhas = gd.ler_fontes(fontes, self.usar_cache, workers=1)
+        self.quadros.update(quadros)
+        self.falhas.difference_update(quadros)
+        self.falhas.update(falhas)
+        return not falhas
+
+    def carregar_caminhos(self, caminhos):
+        # Lê as fontes destes arquivos (ex.: assim que o download de um portal termina)
+        fontes = self.fontes_por_caminho(avisar=False)
+        return self.carregar([fontes[c] for c in map(_normalizar, caminhos) if c in fontes])
+
+    def iniciar(self):
+        inicio = time.perf_counter()
+        if not self.carregar(list(self.fontes_por_caminho().values())):
+            print('[AVISO] Algumas fontes falharam; serão relidas na próxima alteração.')
+        self.gerar(inicio)
+
+    def atualizar(self, caminhos):
+        # Relê só as fontes dos caminhos alterados; SOA removido sai dos quadros.
+        # Devolve None quando nenhuma fonte foi afetada (nada a reconstruir)
+        inicio = time.perf_counter()
+        fontes = self.fontes_por_caminho()
+        soa_por_caminho = {_normalizar(os.path.join(gd.caminho_dir, a)): n for n, a in gd.arquivos_soa.items()}
+        relidas, removidas = {}, []
+        for caminho in map(_normalizar, caminhos):
+            if caminho in fontes:
+                relidas[fontes[caminho][0]] = fontes[caminho]
+            elif soa_por_caminho.get(caminho) in self.quadros:
+                removidas.append(soa_por_caminho[caminho])
+                del self.quadros[soa_por_caminho[caminho]]
+                print(f'[AVISO] {removidas[-1]} removido; seguindo sem ele.')
+        # Fontes que falharam antes também entram na releitura; as que não
+        # existem mais no disco deixam de ser tentadas
+        presentes = {fonte[0]: fonte for fonte in fontes.values()}
+        self.falhas.intersection_update(presentes)
+        for nome in self.falhas:
+            relidas.setdefault(nome, presentes[nome])
+        if not relidas and not removidas:
+            print('[INFO] Nenhuma fonte afetada pelas alterações.')
+            return None
+        if relidas and not self.carregar(list(relidas.values())):
+            print('[ERRO] Falha ao reler as fontes alteradas; dashboard mantido.')
+            metricas.registrar_execucao('falha', time.perf_counter() - inicio)
+            return False
+        return self.gerar(inicio)
+
+    def gerar(self, inicio):
+        if 'CNM' not in self.quadros or 'SGP' not in self.quadros:
+            print('[ERRO] Arquivo CNM ou SGP não carregado; dashboard não gerado.')
+            metricas.registrar_execucao('falha', time.perf_counter() - inicio)
+            return False
+        try:
+            gd.processar(*gd.montar_quadros(self.quadros), **self.opcoes)
+        except Exception as e:
+            # O monitor continua no ar; a próxima alteração tenta de novo
+            print(f'[ERRO] Falha ao gerar o dashboard: {type(e).__name__}: {e}')
+            metricas.registrar_execucao('falha', time.perf_counter() - inicio)
+            return False
+        metricas.registrar_execucao('sucesso', time.perf_counter() - inicio)
+        print(f'[SUCESSO] Dashboard atualizado em {time.perf_counter() - inicio:.1f}s.')
+        return True
@@ -0,0 +1,47 @@
+import datetime
+import numpy as np
+import pandas as pd
+
+# Formatos conhecidos das datas de cada fonte, na ordem em que são tentados
+FORMATOS_DATA_CNM = ['%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%Y']
+FORMATOS_DATA_SOA = ['%d/%m/%Y', '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M']
+
+FORMATO_SAIDA = '%d/%m/%Y %H:%M'
+
+
+def converter_datas(serie, formatos):
+    # Converte cada valor distinto uma única vez: primeiro com os formatos
+    # conhecidos, depois (só para o que sobrar) com inferência dayfirst.
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    codigos, unicos = pd.factorize(serie)
+    unicos = pd.Series(unicos, dtype=object)
+    convertidos = pd.Series(pd.NaT, index=unicos.index, dtype='datetime64[ns]')
+
+    ja_datas = unicos.map(lambda v: isinstance(v, datetime.datetime)).astype(bool)
+    if ja_datas.any():
+        convertidos[ja_datas] = pd.to_datetime(unicos[ja_datas])
+
+    textos = unicos[~ja_datas].astype(str).str.strip()
+    for formato in formatos:
+        pendentes = convertidos.isna() & ~ja_datas
+        if not pendentes.any():
+            break
+        convertidos[pendentes] = pd.to_datetime(textos[pendentes], format=formato, errors='coerce')
+
+    pendentes = convertidos.isna() & ~ja_datas
+    if pendentes.any():
+        convertidos[pendentes] = pd.to_datetime(textos[pendentes], dayfirst=True, format='mixed', errors='coerce')
+
+    resultado = convertidos.to_numpy()[codigos]
+    resultado[codigos < 0] = np.datetime64('NaT')
+    return pd.Series(resultado, index=serie.index, name=serie.name)
+
+
+def formatar_datas(serie, vazio='-', formato=FORMATO_SAIDA):
+    # Formatação só na saída, também uma vez por valor distinto
+    codigos, unicos = pd.factorize(serie)
+    textos = pd.DatetimeIndex(unicos).strftime(formato).to_numpy(dtype=object)
+    resultado = np.full(len(codigos), vazio, dtype=object)
+    resultado[codigos >= 0] = textos[codigos[codigos >= 0]]
+    return resultado
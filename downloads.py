@@ -0,0 +1,127 @@
+import fnmatch
+import os
+import threading
+import time
+import zipfile
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+from navegador import mover_para
+
+# Espera um download do Chrome terminar na pasta de uma exportação, por
+# eventos do sistema de arquivos (inotify no Linux) em vez de listar a pasta
+# a cada segundo. O Chrome grava em <nome>.crdownload e renomeia no fim: essa
+# renomeação é o sinal de arquivo completo. Arquivos gravados direto com o
+# nome final só valem depois de o tamanho ficar estável. Antes de aceitar, o
+# arquivo passa pela verificação de integridade da extensão (.xlsx = zip
+# legível).
+
+EXTENSOES_TEMPORARIAS = ('.crdownload', '.tmp', '.part')
+# Arquivo sem mudança de tamanho/data por tantos segundos = gravação encerrada
+ESPERA_ESTAVEL = 0.5
+# Revarre a pasta mesmo sem eventos (rede de segurança para sistemas de
+# arquivos sem notificação, ex.: pastas de rede)
+INTERVALO_VARREDURA = 5
+
+
+class _Eventos(FileSystemEventHandler):
+    # Acorda a espera a cada mudança e guarda os arquivos vindos de .crdownload
+    def __init__(self):
+        super().__init__()
+        self.sinal = threading.Event()
+        self.lock = threading.Lock()
+        self.renomeados = set()
+
+    def on_created(self, event):
+        self.sinal.set()
+
+    def on_modified(self, event):
+        self.sinal.set()
+
+    def on_closed(self, event):
+        self.sinal.set()
+
+    def on_moved(self, event):
+        if not event.is_directory and event.src_path.endswith(EXTENSOES_TEMPORARIAS):
+            with self.lock:
+                self.renomeados.add(os.path.normcase(event.dest_path))
+        self.sinal.set()
+
+
+def _xlsx_integro(caminho):
+    try:
+        with zipfile.ZipFile(caminho) as arquivo:
+            return arquivo.testzip() is None
+    except (zipfile.BadZipFile, OSError):
+        return False
+
+
+VERIFICACOES = {
+    # extensão: função(caminho) -> bool
+    '.xlsx': _xlsx_integro,
+}
+
+
+def _assinatura(caminho):
+    try:
+        info = os.stat(caminho)
+    except OSError:
+        return None
+    return info.st_size, info.st_mtime_ns
+
+
+def aguardar_download(pasta, padrao='*', timeout=120, tamanho_minimo=1):
+    # Devolve o caminho do primeiro arquivo completo e íntegro com nome no
+    # padrão (fnmatch); TimeoutError se nenhum chegar a tempo
+    eventos = _Eventos()
+    observador = Observer()
+    observador.schedule(eventos, pasta, recursive=False)
+    observador.start()
+    try:
+        # A varredura vem depois do início do observador: um arquivo que chegou
+        # antes é achado por ela, um que chegar depois gera evento
+        limite = time.monotonic() + timeout
+        vistos = {}       # caminho -> (assinatura, desde quando)
+        rejeitados = {}   # caminho -> assinatura reprovada na integridade
+        print(f"[INFO] Aguardando download ({padrao})...")
+        while True:
+            eventos.sinal.clear()
+            agora = time.monotonic()
+            nomes = os.listdir(pasta)
+            em_andamento = any(nome.endswith(EXTENSOES_TEMPORARIAS) for nome in nomes)
+            instaveis = False
+            for nome in nomes:
+                if nome.endswith(EXTENSOES_TEMPORARIAS) or not fnmatch.fnmatch(nome, padrao):
+                    continue
+                caminho = os.path.join(pasta, nome)
+                assinatura = _assinatura(caminho)
+                if assinatura is None or assinatura[0] < tamanho_minimo or rejeitados.get(caminho) == assinatura:
+                    continue
+                with eventos.lock:
+                    renomeado = os.path.normcase(caminho) in eventos.renomeados
+                if vistos.get(caminho, (None,))[0] != assinatura:
+                    vistos[caminho] = (assinatura, agora)
+                if not renomeado and (em_andamento or agora - vistos[caminho][1] < ESPERA_ESTAVEL):
+                    instaveis = True
+                    continue
+                verificar = VERIFICACOES.get(os.path.splitext(nome)[1].lower())
+                if verificar is not None and not verificar(caminho):
+                    print(f"[AVISO] Arquivo {nome} incompleto ou corrompido; aguardando novo download...")
+                    rejeitados[caminho] = assinatura
+                    continue
+                print(f"[INFO] Download completo: {caminho}")
+                return caminho
+
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                raise TimeoutError(f"Nenhum download completo ({padrao}) em {timeout}s.")
+            eventos.sinal.wait(min(restante, ESPERA_ESTAVEL if instaveis else INTERVALO_VARREDURA))
+    finally:
+        observador.stop()
+        observador.join()
+
+
+def receber_download(temporaria, pasta, nome_final, padrao='*', timeout=120, tamanho_minimo=1):
+    # Espera o download na pasta da exportação e move para a pasta final com o nome esperado
+    destino = mover_para(aguardar_download(temporaria, padrao, timeout, tamanho_minimo), pasta, nome_final)
+    print(f"[INFO] Arquivo salvo como: {destino}")
+    return destino
@@ -0,0 +1,158 @@
+import contextlib
+import html
+import json
+import os
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from conciliacao import renderizar_saida, PRESENCA_CNM, PRESENCA_SOA, PRESENCA_SGP
+from datas import formatar_datas
+
+# Escritores da saída que percorrem o resultado em blocos: cada bloco é
+# renderizado, gravado e descartado, então a memória usada aqui não cresce
+# com o tamanho da carteira.
+TAMANHO_BLOCO_SAIDA = 20_000
+
+
+@contextlib.contextmanager
+def substituir_ao_final(caminho):
+    # Grava em <caminho>.tmp e só troca pelo arquivo final no fim: uma geração
+    # interrompida (ex.: substituída pelo monitor) não deixa saída pela metade
+    temporario = caminho + '.tmp'
+    try:
+        yield temporario
+        os.replace(temporario, caminho)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+
+def blocos(df, tamanho=TAMANHO_BLOCO_SAIDA):
+    for inicio in range(0, len(df), tamanho):
+        yield df.iloc[inicio:inicio + tamanho]
+
+
+def sem_renderizar(df):
+    # Para quadros que já estão no formato final (ex.: visões pareadas)
+    return df
+
+
+def _celula(valor):
+    if valor is None or (isinstance(valor, float) and np.isnan(valor)):
+        return None
+    return valor
+
+
+def escrever_excel(df, caminho, renderizar=renderizar_saida):
+    # openpyxl em modo write_only grava as linhas direto no XML da planilha
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Sheet1')
+    ws.append(list(df.columns))
+    for bloco in blocos(df):
+        saida = renderizar(bloco).astype(object)
+        for linha in saida.itertuples(index=False, name=None):
+            ws.append([_celula(v) for v in linha])
+    with substituir_ao_final(caminho) as temporario:
+        wb.save(temporario)
+
+
+def escrever_dados_dashboard(df, caminho):
+    # Linhas como arrays JSON; Tipo, Local e Status vão como códigos e são
+    # convertidos em texto/HTML no navegador, só para as linhas exibidas
+    with substituir_ao_final(caminho) as temporario, open(temporario, "w", encoding="utf-8") as f:
+        f.write('window.DADOS_DASHBOARD = {"tipos": ')
+        f.write(json.dumps([str(c) for c in df['Tipo'].cat.categories], ensure_ascii=False))
+        f.write(', "status": ')
+        f.write(json.dumps([str(c) for c in df['Status'].cat.categories], ensure_ascii=False))
+        f.write(', "linhas": [')
+        primeiro = True
+        for bloco in blocos(df):
+            linhas = pd.DataFrame({
+                "ID": bloco['ID'],
+                "Documento": bloco['Documento'],
+                "Nome": bloco['Nome'],
+                "Data": formatar_datas(bloco['Data']),
+                "Tipo": bloco['Tipo'].cat.codes,
+                "Local": bloco['Local'],
+                "Status": bloco['Status'].cat.codes
+            }).to_json(orient='values', force_ascii=False)
+            if len(linhas) > 2:
+                f.write(linhas[1:-1] if primeiro else ',' + linhas[1:-1])
+                primeiro = False
+        f.write(']};\n')
+
+
+# Funções do navegador que convertem os códigos do .dados.js (Tipo, Local e
+# Status) em texto/HTML; usadas pelo dashboard e pelas páginas fatiadas
+SCRIPT_COLUNAS_DADOS = f"""
+        const origens = [['CNM', {PRESENCA_CNM}], ['SOA', {PRESENCA_SOA}], ['SGP', {PRESENCA_SGP}]];
+        function local(codigo) {{
+            return origens.map(function (o) {{
+                return "<span style='color:" + (codigo & o[1] ? "green" : "red") + "'>" + o[0] + "</span>";
+            }}).join(' | ');
+        }}
+        function colunasDados(dados) {{
+            return [
+                {{ defaultContent: '' }},
+                {{}},
+                {{ defaultContent: '' }},
+                {{}},
+                {{ render: function (d) {{ return dados.tipos[d] || ''; }} }},
+                {{ render: local }},
+                {{ render: function (d) {{ return dados.status[d] || ''; }} }}
+            ];
+        }}
+"""
+
+
+def escrever_tabela_vazia(f, df, table_id='tabela'):
+    # Só o cabeçalho; as linhas vêm do .dados.js via DataTables (deferRender)
+    cabecalho = ''.join(f'<th>{html.escape(str(c))}</th>' for c in df.columns)
+    f.write(f"    <table id='{table_id}' class='display'>\n"
+            f"        <thead><tr>{cabecalho}</tr></thead>\n"
+            "    </table>\n")
+
+
+def linhas_html(df, renderizar=renderizar_saida):
+    # Gera o <tbody> da tabela em pedaços (Local já sai como HTML, sem escape,
+    # como no df.to_html(escape=False) de antes)
+    for bloco in blocos(df):
+        saida = renderizar(bloco).astype(object)
+        partes = []
+        for linha in saida.itertuples(index=False, name=None):
+            celulas = ''.join(f'<td>{"" if _celula(v) is None else v}</td>' for v in linha)
+            partes.append(f'<tr>{celulas}</tr>\n')
+        yield ''.join(partes)
+
+
+def escrever_tabela_html(f, df, table_id='tabela', renderizar=renderizar_saida):
+    cabecalho = ''.join(f'<th>{html.escape(str(c))}</th>' for c in df.columns)
+    f.write(f"<table id='{table_id}' class='display'>\n<thead><tr>{cabecalho}</tr></thead>\n<tbody>\n")
+    for pedaco in linhas_html(df, renderizar):
+        f.write(pedaco)
+    f.write('</tbody>\n</table>\n')
+
+
+def exportar_resultado(df, caminho, formato):
+    if formato not in ('csv', 'parquet'):
+        raise ValueError(f'formato de exportação desconhecido: {formato}')
+    with substituir_ao_final(caminho) as temporario:
+        if formato == 'csv':
+            for i, bloco in enumerate(blocos(df) if len(df) else [df]):
+                renderizar_saida(bloco).to_csv(temporario, mode='w' if i == 0 else 'a', header=i == 0,
+                                               index=False, encoding='utf-8')
+        else:
+            # Parquet guarda os tipos de verdade: Data como data, Local como código
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            escritor = None
+            try:
+                for bloco in blocos(df) if len(df) else [df]:
+                    tabela = pa.Table.from_pandas(bloco.astype({'ID': 'string', 'Nome': 'string'}),
+                                                  preserve_index=False)
+                    if escritor is None:
+                        escritor = pq.ParquetWriter(temporario, tabela.schema)
+                    escritor.write_table(tabela.cast(escritor.schema))
+            finally:
+                if escritor is not None:
+                    escritor.close()
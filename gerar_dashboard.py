@@ -2,7 +2,28 @@
 import pandas as pd
 import os
 import html
+import time
+import argparse
+import functools
+import metricas
+import perfil
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from cache_entradas import carregar_com_cache, parquet_disponivel
+from conciliacao import juntar_fontes, conciliar_juncao, verificar_conciliacao
+from conciliacao_incremental import conciliar_incremental, verificar_incremental, saidas_conferem, registrar_saidas
+from chave_documento import (
+    empacotar_documentos, anexar_documentos_longos, registrar_documentos_longos, avisar_documentos_invalidos
+)
+from datas import converter_datas, FORMATOS_DATA_CNM, FORMATOS_DATA_SOA
+from escritores import (
+    escrever_dados_dashboard, escrever_excel, escrever_tabela_html, escrever_tabela_vazia, exportar_resultado,
+    substituir_ao_final, SCRIPT_COLUNAS_DADOS
+)
+from resumo import calcular_resumo, painel_resumo_html, resumo_json
+from paginas_fatiadas import gerar_paginas_fatiadas, brotli_disponivel, ARQUIVO_INDICE
+from visoes import gerar_visoes, VISOES
+from leitor_xlsx import ler_xlsx_colunas, COLUNAS_CNM, COLUNAS_SGP
 
 # Caminhos dos arquivos
 caminho_dir = './download'
@@ -12,6 +33,9 @@ os.makedirs(saida_dir, exist_ok=True)
 caminho_cnm = os.path.join(caminho_dir, 'Relatorio_CNM.xlsx')
 caminho_sgp = os.path.join(caminho_dir, 'Relatorio_SGP.xlsx')
 
+# Incrementar quando a leitura/normalização mudar, invalidando o cache
+VERSAO_LEITORES = 7
+
 arquivos_soa = {
     "Ativas": "Ativas.csv",
     "Baixadas": "Baixadas.csv",
@@ -20,6 +44,10 @@ arquivos_soa = {
     "Erros": "Erros.csv"
 }
 
+# Campos do SOA usados na conciliação e linhas lidas por vez de cada CSV
+COLUNAS_SOA = ['Unique ID', 'documento', 'devedor', 'data']
+TAMANHO_BLOCO_SOA = 50_000
+
 def deduplicar_colunas(cols):
     counter = Counter()
     novas = []
@@ -39,162 +67,320 @@ def normalizar_documento(coluna):
             .str.strip()
     )
 
-def ler_e_normalizar_soa(nome, caminho_arquivo):
-    print(f"[INFO] Lendo arquivo: {nome} -> {caminho_arquivo}")
-    df = pd.read_csv(caminho_arquivo, encoding="utf-8")
-    raw_cols = list(df.columns)
+def decodificar_cabecalho_soa(nome, raw_cols):
+    # Devolve a posição, no arquivo, da primeira coluna de cada campo usado
     cols = [html.unescape(col).replace('+ACI-', '').replace('+AC0-', '-').replace('"', '').strip() for col in raw_cols]
     if len(set(cols)) < len(cols):
         print(f"[AVISO] Colunas duplicadas detectadas em {nome}. Renomeando com sufixos...")
         cols = deduplicar_colunas(cols)
-    df.columns = cols
-    df = df.rename(columns={
+    renomear = {
         'Documento': 'documento',
         'Devedor': 'devedor',
         'Unique ID': 'Unique ID',
         'Data Inclusão': 'data',
         'Data Inclusao': 'data',
         'Data Exclusão': 'data'
-    })
-    df = df.loc[:, ~df.columns.duplicated()]
-    df['documento'] = normalizar_documento(df['documento'])
-    df['fonte'] = nome
-    return df
+    }
+    posicoes = {}
+    for i, col in enumerate(cols):
+        col = renomear.get(col, col)
+        if col in COLUNAS_SOA and col not in posicoes:
+            posicoes[col] = i
+    return posicoes
 
-def carregar_dados():
-    if not os.path.exists(caminho_cnm) or not os.path.exists(caminho_sgp):
-        print('[ERRO] Arquivo CNM ou SGP não encontrado.')
-        exit(1)
+def reduzir_soa(df):
+    # A conciliação só usa, por documento, a primeira linha e a primeira
+    # linha com Unique ID; o resto do histórico pode ser descartado.
+    manter = ~df['chave'].duplicated()
+    if 'Unique ID' in df:
+        # Só entre as linhas com ID, sem passar a chave uint64 por float64
+        # (chaves próximas colidiriam e o ID de um documento sumiria)
+        com_id = df['Unique ID'].notna().to_numpy()
+        manter[com_id] |= ~df['chave'][com_id].duplicated().to_numpy()
+    return df[manter]
+
+def ler_e_normalizar_soa(nome, caminho_arquivo):
+    print(f"[INFO] Lendo arquivo: {nome} -> {caminho_arquivo}")
+    raw_cols = list(pd.read_csv(caminho_arquivo, encoding="utf-8", nrows=0).columns)
+    posicoes = decodificar_cabecalho_soa(nome, raw_cols)
+    if 'documento' not in posicoes:
+        raise ValueError(f"coluna 'Documento' não encontrada no cabeçalho de {nome}")
+    colunas = sorted(posicoes, key=posicoes.get)
+    colunas_saida = ['chave' if c == 'documento' else c for c in colunas]
 
-    print('[INFO] Lendo arquivos CNM e SGP...')
-    cnm_df = pd.read_excel(caminho_cnm, engine='openpyxl')
-    sgp_df = pd.read_excel(caminho_sgp, skiprows=8)
+    blocos = pd.read_csv(caminho_arquivo, encoding="utf-8", usecols=sorted(posicoes.values()),
+                         dtype=str, chunksize=TAMANHO_BLOCO_SOA)
+    reduzidos = []
+    for bloco in blocos:
+        bloco.columns = colunas
+        bloco['documento'] = empacotar_documentos(normalizar_documento(bloco['documento']))
+        bloco = bloco.rename(columns={'documento': 'chave'})
+        reduzidos.append(reduzir_soa(bloco))
+        if len(reduzidos) >= 8:
+            reduzidos = [reduzir_soa(pd.concat(reduzidos, ignore_index=True))]
 
-    print('[INFO] Normalizando documentos...')
-    cnm_df['Documento'] = cnm_df['Documento'].astype(str).str.replace(r'\D', '', regex=True)
-    sgp_df['CPF/CNPJ'] = sgp_df['CPF/CNPJ'].astype(str).str.replace(r'\D', '', regex=True)
+    df = reduzir_soa(pd.concat(reduzidos, ignore_index=True)) if reduzidos else pd.DataFrame(columns=colunas_saida)
+    if 'data' in df:
+        df['data'] = converter_datas(df['data'], FORMATOS_DATA_SOA)
+    df['fonte'] = pd.Categorical([nome] * len(df), categories=list(arquivos_soa))
+    df = df.reset_index(drop=True).astype({'chave': 'uint64'})
+    return anexar_documentos_longos(df)
 
-    print('[INFO] Criando conjunto de documentos do SGP...')
-    documentos_sgp = set(sgp_df['CPF/CNPJ'])
+def ler_cnm(caminho):
+    print(f"[INFO] Lendo arquivo: CNM -> {caminho}")
+    df = ler_xlsx_colunas(caminho, COLUNAS_CNM)
+    df['Tipo'] = df['Tipo'].astype('category')
+    df['Data / Hora'] = converter_datas(df['Data / Hora'], FORMATOS_DATA_CNM)
+    documentos = df.pop('Documento').astype(str).str.replace(r'\D', '', regex=True)
+    df['chave'] = empacotar_documentos(documentos)
+    return anexar_documentos_longos(df)
 
-    print('[INFO] Aplicando lógica de status ao CNM...')
-    cnm_df['Status'] = cnm_df.apply(lambda row: definir_status(row, documentos_sgp), axis=1)
+def ler_sgp(caminho):
+    print(f"[INFO] Lendo arquivo: SGP -> {caminho}")
+    df = ler_xlsx_colunas(caminho, COLUNAS_SGP)
+    documentos = df.pop('CPF/CNPJ').astype(str).str.replace(r'\D', '', regex=True)
+    df['chave'] = empacotar_documentos(documentos)
+    return anexar_documentos_longos(df)
 
-    print('[INFO] Contagem final de status:')
-    print(cnm_df['Status'].value_counts())
+def quadro_para_arrow(df):
+    # Serializa em Arrow IPC para devolver o quadro do processo de leitura
+    # sem passar pelo pickle do DataFrame; sem pyarrow devolve o próprio quadro
+    if not parquet_disponivel():
+        return df
+    import pyarrow as pa
+    try:
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowException, TypeError, ValueError):
+        return df
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, tabela.schema) as writer:
+        writer.write_table(tabela)
+    return sink.getvalue().to_pybytes()
+
+def arrow_para_quadro(dados):
+    if isinstance(dados, pd.DataFrame):
+        return dados
+    import pyarrow as pa
+    return pa.ipc.open_stream(dados).read_all().to_pandas()
+
+def ler_fonte(nome, caminho, leitor, usar_cache):
+    df = carregar_com_cache(nome, caminho, leitor, VERSAO_LEITORES, usar_cache)
+    return quadro_para_arrow(df)
 
-    lista_soa = []
+def listar_fontes(avisar=True):
+    # (nome, caminho, leitor) de cada arquivo de entrada presente
+    fontes = [('CNM', caminho_cnm, ler_cnm), ('SGP', caminho_sgp, ler_sgp)]
     for nome, arquivo in arquivos_soa.items():
         caminho = os.path.join(caminho_dir, arquivo)
         if os.path.exists(caminho):
-            df = ler_e_normalizar_soa(nome, caminho)
-            lista_soa.append(df)
-        else:
+            fontes.append((nome, caminho, functools.partial(ler_e_normalizar_soa, nome)))
+        elif avisar:
             print(f"[AVISO] Arquivo {arquivo} não encontrado.")
+    return fontes
 
-    soa_df = pd.concat(lista_soa, ignore_index=True) if lista_soa else pd.DataFrame(columns=["documento", "devedor", "data", "fonte", "Unique ID"])
-    return cnm_df, sgp_df, soa_df
-
-def determinar_status(presente_sgp, tipo, fontes):
-    tipo = tipo.strip().upper()
-    if tipo == "INCLUSAO":
-        return "NEGATIVADO" if presente_sgp else "ERRO"
-    elif tipo == "EXCLUSAO":
-        return "ERRO" if presente_sgp else "BAIXADO"
+def ler_fontes(fontes, usar_cache=True, workers=None):
+    # Devolve os quadros lidos por nome e a lista de fontes que falharam
+    workers = min(workers or os.cpu_count() or 1, len(fontes))
+    print(f'[INFO] Lendo e normalizando {len(fontes)} arquivos ({workers} processo(s))...')
+    quadros = {}
+    falhas = []
+    if workers == 1:
+        for nome, caminho, leitor in fontes:
+            try:
+                with perfil.medir(f'leitura:{nome}') as info:
+                    quadros[nome] = carregar_com_cache(nome, caminho, leitor, VERSAO_LEITORES, usar_cache)
+                    info['linhas'] = len(quadros[nome])
+            except Exception as e:
+                print(f'[ERRO] Falha ao ler {nome} ({caminho}): {type(e).__name__}: {e}')
+                falhas.append(nome)
     else:
-        return "ERRO"
-
-def definir_status(row, documentos_sgp):
-    doc = row['Documento']
-    tipo = str(row['Tipo']).strip().upper()
-    if tipo == "INCLUSAO":
-        return "NEGATIVADO"
-    elif tipo == "EXCLUSAO":
-        return "ERRO" if doc in documentos_sgp else "BAIXADO"
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futuros = {nome: (caminho, pool.submit(ler_fonte, nome, caminho, leitor, usar_cache))
+                       for nome, caminho, leitor in fontes}
+            for nome, (caminho, futuro) in futuros.items():
+                try:
+                    quadros[nome] = arrow_para_quadro(futuro.result())
+                except Exception as e:
+                    print(f'[ERRO] Falha ao ler {nome} ({caminho}): {type(e).__name__}: {e}')
+                    falhas.append(nome)
+
+    caminhos = {nome: caminho for nome, caminho, _ in fontes}
+    for nome, df in quadros.items():
+        registrar_documentos_longos(df)
+        avisar_documentos_invalidos(nome, df['chave'])
+        metricas.registrar_fonte(nome, caminhos[nome], len(df))
+    return quadros, falhas
+
+def montar_quadros(quadros):
+    # CNM, SGP e o SOA de todas as fontes presentes, na ordem de arquivos_soa
+    lista_soa = [quadros[nome] for nome in arquivos_soa if nome in quadros]
+    if lista_soa:
+        soa_df = pd.concat(lista_soa, ignore_index=True)
     else:
-        return "ERRO"
-
-def gerar_dashboard():
-    cnm_df, sgp_df, soa_df = carregar_dados()
-    documentos = set(cnm_df['Documento']) | set(soa_df['documento']) | set(sgp_df['CPF/CNPJ'])
-
-    dados = []
-    for doc in documentos:
-        row_cnm = cnm_df[cnm_df['Documento'] == doc]
-        row_sgp = sgp_df[sgp_df['CPF/CNPJ'] == doc]
-        row_soa = soa_df[soa_df['documento'] == doc]
-
-        presente_sgp = not row_sgp.empty
-        fontes = list(row_soa['fonte'].unique()) if not row_soa.empty else []
-
-        if not row_cnm.empty:
-            tipo = row_cnm['Tipo'].values[0]
-            data = pd.to_datetime(row_cnm['Data / Hora'].values[0], dayfirst=True).strftime('%d/%m/%Y %H:%M')
-            fontes.append('CNM' if tipo == 'INCLUSAO' else 'CNM_EXCLUSAO')
-        elif not row_soa.empty:
-            tipo = row_soa['fonte'].values[0]
-            data = row_soa['data'].values[0]
-        else:
-            tipo = "-"
-            data = "-"
-
-        nome = row_soa['devedor'].values[0] if not row_soa.empty else "-"
-        id_val = row_soa['Unique ID'].values[0] if 'Unique ID' in row_soa and not row_soa['Unique ID'].isnull().all() else "-"
-
-        local = " | ".join([
-            f"<span style='color:{"green" if not row.empty else "red"}'>{origem}</span>"
-            for origem, row in [('CNM', row_cnm), ('SOA', row_soa), ('SGP', row_sgp)]
-        ])
-
-        status = determinar_status(presente_sgp, tipo, fontes)
-
-        dados.append({
-            "ID": id_val,
-            "Documento": doc,
-            "Nome": nome,
-            "Data": data,
-            "Tipo": tipo,
-            "Local": local,
-            "Status": status
+        # Sem nenhum CSV do SOA: quadro vazio com os mesmos tipos do leitor
+        soa_df = pd.DataFrame({
+            'Unique ID': pd.Series(dtype=object),
+            'chave': pd.Series(dtype='uint64'),
+            'devedor': pd.Series(dtype=object),
+            'data': pd.Series(dtype='datetime64[ns]'),
+            'fonte': pd.Categorical([], categories=list(arquivos_soa))
         })
+    return quadros['CNM'], quadros['SGP'], soa_df
 
-    df = pd.DataFrame(dados)
-    df.to_excel(os.path.join(saida_dir, "resultado_unificado.xlsx"), index=False)
-    gerar_html(df)
+def carregar_dados(usar_cache=True, workers=None):
+    if not os.path.exists(caminho_cnm) or not os.path.exists(caminho_sgp):
+        print('[ERRO] Arquivo CNM ou SGP não encontrado.')
+        exit(1)
 
-def gerar_html(df):
-    html_tabela = df.to_html(index=False, escape=False, table_id='tabela', classes='display')
+    quadros, falhas = ler_fontes(listar_fontes(), usar_cache, workers)
+    if falhas:
+        print(f'[ERRO] Leitura interrompida: {", ".join(falhas)}.')
+        exit(1)
+    return montar_quadros(quadros)
+
+def gerar_dashboard(verificar=False, usar_cache=True, incremental=False, completo=False, workers=None,
+                    exportar=None, html_estatico=False, fatiado=False, visoes=False,
+                    relatorio_perfil=None, cprofile=False):
+    if fatiado and not brotli_disponivel():
+        # Falha antes de ler tudo, em vez de gerar as páginas sem os .br
+        print("[ERRO] --fatiado precisa do pacote 'brotli' (pip install brotli) para gravar as páginas .br.")
+        exit(1)
+    metricas.iniciar('gerar_dashboard')
+    if relatorio_perfil:
+        perfil.ativar(cprofile)
+        if workers != 1:
+            # Nos processos de leitura o tracemalloc/cProfile daqui não enxergam nada
+            print('[PERFIL] Leitura em sequência (--workers 1) para medir cada arquivo.')
+            workers = 1
+    inicio = time.perf_counter()
+    resultado = 'falha'
+    try:
+        with metricas.etapa('leitura') as info:
+            cnm_df, sgp_df, soa_df = carregar_dados(usar_cache, workers)
+            info['linhas'] = len(cnm_df) + len(sgp_df) + len(soa_df)
+        processar(cnm_df, sgp_df, soa_df, verificar=verificar, incremental=incremental, completo=completo,
+                  exportar=exportar, html_estatico=html_estatico, fatiado=fatiado, visoes=visoes)
+        resultado = 'sucesso'
+    finally:
+        metricas.registrar_execucao(resultado, time.perf_counter() - inicio)
+        if relatorio_perfil:
+            perfil.gravar_relatorio(relatorio_perfil, resultado=resultado, versao_leitores=VERSAO_LEITORES,
+                                    incremental=incremental, cprofile=cprofile)
+
+def processar(cnm_df, sgp_df, soa_df, verificar=False, incremental=False, completo=False,
+              exportar=None, html_estatico=False, fatiado=False, visoes=False):
+    # Conciliação e saídas a partir dos quadros já carregados (também usado
+    # pelo modo residente do monitor, que mantém os quadros em memória)
+    print('[INFO] Conciliando documentos...')
+    # A junção por documento é feita uma vez e serve à visão unificada e às pareadas
+    with metricas.etapa('conciliacao') as info:
+        juncao = juntar_fontes(cnm_df, sgp_df, soa_df) if visoes or not incremental else None
+        if incremental:
+            df, alterados, execucao = conciliar_incremental(cnm_df, sgp_df, soa_df, VERSAO_LEITORES, completo)
+        else:
+            df, alterados, execucao = conciliar_juncao(juncao), None, None
+        info['linhas'] = len(df)
+    contagem = df['Status'].value_counts()
+    metricas.registrar_status(contagem)
+    print('[INFO] Contagem final de status:')
+    print(contagem)
+
+    if verificar:
+        with metricas.etapa('verificacao'):
+            verificar_conciliacao(cnm_df, sgp_df, soa_df)
+            if incremental:
+                verificar_incremental(df, cnm_df, sgp_df, soa_df)
+
+    caminho_excel = os.path.join(saida_dir, "resultado_unificado.xlsx")
+    caminho_html = os.path.join(saida_dir, "dashboard_unificado.html")
+    caminho_dados = os.path.join(saida_dir, "dashboard_unificado.dados.js")
+    pasta_fatias = os.path.join(saida_dir, "fatias")
+    saidas = [caminho_excel, caminho_html, caminho_dados]
+    if exportar:
+        saidas.append(os.path.join(saida_dir, f"resultado_unificado.{exportar}"))
+    if fatiado:
+        saidas.append(os.path.join(pasta_fatias, ARQUIVO_INDICE))
+    if visoes:
+        saidas += [os.path.join(saida_dir, f"{prefixo}_{nome}.{ext}")
+                   for nome in VISOES for prefixo, ext in (("resultado", "xlsx"), ("dashboard", "html"))]
+    if alterados == 0 and saidas_conferem(execucao, saidas):
+        print('[INFO] Nenhum documento alterado desde a última execução. Saídas mantidas.')
+        return
+
+    with metricas.etapa('excel') as info:
+        escrever_excel(df, caminho_excel)
+        info['linhas'] = len(df)
+    with metricas.etapa('html') as info:
+        gerar_html(df, estatico=html_estatico)
+        info['linhas'] = len(df)
+    if exportar:
+        caminho_exportacao = os.path.join(saida_dir, f"resultado_unificado.{exportar}")
+        with metricas.etapa('exportacao'):
+            exportar_resultado(df, caminho_exportacao, exportar)
+        print(f'[INFO] Resultado exportado para {caminho_exportacao}')
+    if fatiado:
+        with metricas.etapa('fatias'):
+            gerar_paginas_fatiadas(df, pasta_fatias)
+    if visoes:
+        with metricas.etapa('visoes'):
+            gerar_visoes(juncao, saida_dir)
+    if execucao is not None:
+        # Só depois de todas as saídas gravadas: uma interrupção antes disso
+        # faz a próxima execução regravá-las mesmo sem documentos alterados
+        registrar_saidas(execucao, saidas)
+
+def gerar_html(df, estatico=False):
+    # estatico=True grava as linhas direto na tabela da página (sem o arquivo
+    # de dados), útil para abrir sem o .dados.js ao lado
+    arquivo_dados = "dashboard_unificado.dados.js"
+    if estatico:
+        script_dados = ''
+    else:
+        with perfil.medir('html:dados'):
+            escrever_dados_dashboard(df, os.path.join(saida_dir, arquivo_dados))
+        script_dados = f"<script src='{arquivo_dados}'></script>"
+    with perfil.medir('html:resumo'):
+        resumo = calcular_resumo(df)
     subtitulos = {
         "NEGATIVADO": "Clientes negativados no CNM ou SOA e presentes no SGP.",
         "BAIXADO": "Clientes excluídos no CNM ou no SOA e ausentes no SGP.",
         "ERRO": "Clientes com inconsistência entre CNM, SOA e SGP."
     }
-    html_code = f"""<!DOCTYPE html>
+    cabeca = f"""<!DOCTYPE html>
 <html lang='pt-BR'>
 <head>
     <meta charset='UTF-8'><title>Dashboard Unificado</title>
     <link rel='stylesheet' href='https://cdn.datatables.net/1.13.4/css/jquery.dataTables.min.css'>
     <script src='https://code.jquery.com/jquery-3.7.0.min.js'></script>
     <script src='https://cdn.datatables.net/1.13.4/js/jquery.dataTables.min.js'></script>
+    {script_dados}
     <style>
         body {{ font-family: Arial; text-align: center; }}
         table {{ margin: 0 auto; width: 90%; }}
         .subtitulo {{ margin: 10px 0; font-weight: bold; }}
+        table.resumo {{ width: auto; margin: 10px auto; border-collapse: collapse; }}
+        table.resumo td, table.resumo th {{ border: 1px solid #ccc; padding: 2px 10px; }}
     </style>
 </head>
 <body>
     <h2>Dashboard Unificado - CNM + SOA x SGP</h2>
+    {painel_resumo_html(resumo)}
     <div class='subtitulo' id='subtitulo'></div>
-    {html_tabela}
-    <footer>VERDE = Presente | VERMELHO = Ausente</footer>
+"""
+    rodape = f"""    <footer>VERDE = Presente | VERMELHO = Ausente</footer>
     <script>
         const subtitulos = {{
             "NEGATIVADO": "{subtitulos['NEGATIVADO']}",
             "BAIXADO": "{subtitulos['BAIXADO']}",
             "ERRO": "{subtitulos['ERRO']}"
         }};
-        $(document).ready(function() {{
+        const dados = window.DADOS_DASHBOARD || null;
+        const resumo = {resumo_json(resumo)};
+{SCRIPT_COLUNAS_DADOS}        $(document).ready(function() {{
             const table = $('#tabela').DataTable({{
+                data: dados ? dados.linhas : undefined,
+                deferRender: true,
+                columns: dados ? colunasDados(dados) : undefined,
                 paging: true,
                 searching: true,
                 ordering: true,
@@ -203,38 +389,88 @@ def gerar_html(df):
                     url: '//cdn.datatables.net/plug-ins/1.13.4/i18n/pt-BR.json'
                 }},
                 initComplete: function () {{
+                    // Opções e contagens vêm do resumo calculado na geração
+                    const escapar = $.fn.dataTable.util.escapeRegex;
+                    const exato = function (v) {{ return '^' + escapar(v) + '$'; }};
+                    const mes = function (v) {{ return v === '-' ? '^-$' : '^[0-9]{{2}}/' + escapar(v); }};
                     const colunasParaFiltrar = {{
-                        3: "Data",
-                        4: "Tipo",
-                        6: "Status"
+                        3: ["Mês", resumo.meses, mes],
+                        4: ["Tipo", resumo.tipos, exato],
+                        6: ["Status", resumo.status, exato]
                     }};
-                    this.api().columns().every(function (index) {{
-                        if (colunasParaFiltrar[index]) {{
-                            const column = this;
-                            const label = colunasParaFiltrar[index];
-                            const select = $('<select><option value="">Filtrar por ' + label + '</option></select>')
-                                .appendTo($(column.header()).empty())
-                                .on('change', function () {{
-                                    const val = $.fn.dataTable.util.escapeRegex($(this).val());
-                                    column.search(val ? '^' + val + '$' : '', true, false).draw();
-                                }});
-                            column.data().unique().sort().each(function (d) {{
-                                if (d) select.append('<option value="' + d + '">' + d + '</option>');
+                    const api = this.api();
+                    Object.keys(colunasParaFiltrar).forEach(function (index) {{
+                        const column = api.column(index);
+                        const [label, opcoes, padrao] = colunasParaFiltrar[index];
+                        const select = $('<select><option value="">Filtrar por ' + label + '</option></select>')
+                            .attr('id', 'filtro-' + index)
+                            .appendTo($(column.header()).empty())
+                            .on('click', function (e) {{ e.stopPropagation(); }})
+                            .on('change', function () {{
+                                const val = $(this).val();
+                                column.search(val ? padrao(val) : '', true, false).draw();
                             }});
-                        }}
+                        opcoes.forEach(function (o) {{
+                            $('<option>').val(o[0]).text(o[0] + ' (' + o[1] + ')').appendTo(select);
+                        }});
+                    }});
+                    // Com um Status escolhido, as contagens por mês passam a ser desse status
+                    $('#filtro-6').on('change', function () {{
+                        const porMes = resumo.status_mes[$(this).val()];
+                        $('#filtro-3 option').each(function () {{
+                            const m = $(this).val();
+                            if (!m) return;
+                            const total = porMes ? (porMes[m] || 0) : resumo.meses.find(function (o) {{ return o[0] === m; }})[1];
+                            $(this).text(m + ' (' + total + ')');
+                        }});
                     }});
                 }}
             }});
             table.on('search.dt', function () {{
                 const val = table.column(-1, {{search: 'applied'}}).data()[0];
-                $('#subtitulo').html(subtitulos[val] || '');
+                $('#subtitulo').html(subtitulos[dados ? dados.status[val] : val] || '');
             }});
         }});
     </script>
 </body>
 </html>"""
-    with open(os.path.join(saida_dir, "dashboard_unificado.html"), "w", encoding="utf-8") as f:
-        f.write(html_code)
+    with perfil.medir('html:pagina'), substituir_ao_final(os.path.join(saida_dir, "dashboard_unificado.html")) as temporario, \
+            open(temporario, "w", encoding="utf-8") as f:
+        f.write(cabeca)
+        if estatico:
+            escrever_tabela_html(f, df)
+        else:
+            escrever_tabela_vazia(f, df)
+        f.write(rodape)
 
 if __name__ == '__main__':
-    gerar_dashboard()
+    parser = argparse.ArgumentParser(description='Gera o dashboard unificado CNM + SOA x SGP.')
+    parser.add_argument('--verificar', action='store_true',
+                        help='compara a conciliação com a implementação original por documento')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='ignora o cache de entradas normalizadas e relê todos os arquivos')
+    parser.add_argument('--incremental', action='store_true',
+                        help='reconcilia apenas os documentos alterados desde a última execução')
+    parser.add_argument('--completo', action='store_true',
+                        help='no modo incremental, refaz a conciliação inteira e recria o estado')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='processos usados na leitura dos arquivos (padrão: número de CPUs; 1 = sequencial)')
+    parser.add_argument('--exportar', choices=['csv', 'parquet'],
+                        help='grava também o resultado unificado em CSV ou Parquet')
+    parser.add_argument('--html-estatico', action='store_true',
+                        help='grava as linhas direto no HTML em vez do arquivo .dados.js')
+    parser.add_argument('--fatiado', action='store_true',
+                        help='grava também uma página por Status e por mês (com .gz/.br) em output/fatias')
+    parser.add_argument('--visoes', action='store_true',
+                        help='gera também as visões CNM x SGP e SOA x SGP a partir da mesma leitura')
+    parser.add_argument('--profile', nargs='?', const=os.path.join(perfil.perfil_dir, 'perfil.json'),
+                        metavar='RELATORIO',
+                        help='mede tempo, CPU, pico de memória e linhas de cada etapa e grava um relatório JSON '
+                             '(padrão: perfil/perfil.json)')
+    parser.add_argument('--cprofile', action='store_true',
+                        help='com --profile, grava também um dump do cProfile por etapa em perfil/')
+    args = parser.parse_args()
+    gerar_dashboard(verificar=args.verificar, usar_cache=not args.no_cache,
+                    incremental=args.incremental, completo=args.completo, workers=args.workers,
+                    exportar=args.exportar, html_estatico=args.html_estatico, fatiado=args.fatiado, visoes=args.visoes,
+                    relatorio_perfil=args.profile, cprofile=args.cprofile)
@@ -0,0 +1,200 @@
+import os
+import posixpath
+import sys
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+import pandas as pd
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format
+from openpyxl.utils.datetime import from_excel, CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900
+
+# Leitura somente-leitura e em fluxo do XML da primeira planilha de um .xlsx,
+# mantendo apenas as colunas pedidas. O cabeçalho é localizado procurando a
+# primeira linha que contém todas as colunas pedidas.
+
+NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+NS_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+COLUNAS_CNM = ['Id', 'Documento', 'Tipo', 'Data / Hora']
+COLUNAS_SGP = ['CPF/CNPJ', 'Nome/Razão Social']
+
+LIMITE_BUSCA_CABECALHO = 100
+
+
+def _texto(elemento):
+    # <si>/<is> podem ter texto simples (<t>) ou trechos formatados (<r><t>)
+    return ''.join(t.text or '' for t in elemento.iter(NS + 't'))
+
+
+def _caminho_primeira_planilha(zf):
+    workbook = ET.fromstring(zf.read('xl/workbook.xml'))
+    primeira = workbook.find(f'{NS}sheets/{NS}sheet')
+    rel_id = primeira.get(NS_REL + 'id')
+    rels = ET.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+    for rel in rels.iter(NS_PKG_REL + 'Relationship'):
+        if rel.get('Id') == rel_id:
+            alvo = rel.get('Target')
+            return alvo.lstrip('/') if alvo.startswith('/') else posixpath.normpath(posixpath.join('xl', alvo))
+    raise ValueError('planilha inicial não encontrada em xl/workbook.xml')
+
+
+def _calendario(zf):
+    propriedades = ET.fromstring(zf.read('xl/workbook.xml')).find(NS + 'workbookPr')
+    if propriedades is not None and propriedades.get('date1904') in ('1', 'true'):
+        return CALENDAR_MAC_1904
+    return CALENDAR_WINDOWS_1900
+
+
+def _strings_compartilhadas(zf):
+    if 'xl/sharedStrings.xml' not in zf.namelist():
+        return []
+    strings = []
+    with zf.open('xl/sharedStrings.xml') as f:
+        for _, elemento in ET.iterparse(f):
+            if elemento.tag == NS + 'si':
+                strings.append(_texto(elemento))
+                elemento.clear()
+    return strings
+
+
+def _estilos_de_data(zf):
+    # Índices de cellXfs cujo formato numérico é de data/hora
+    if 'xl/styles.xml' not in zf.namelist():
+        return set()
+    estilos = ET.fromstring(zf.read('xl/styles.xml'))
+    formatos = dict(BUILTIN_FORMATS)
+    for fmt in estilos.iter(NS + 'numFmt'):
+        formatos[int(fmt.get('numFmtId'))] = fmt.get('formatCode')
+    cell_xfs = estilos.find(NS + 'cellXfs')
+    if cell_xfs is None:
+        return set()
+    return {
+        i for i, xf in enumerate(cell_xfs.iter(NS + 'xf'))
+        if is_date_format(formatos.get(int(xf.get('numFmtId', 0)), 'General'))
+    }
+
+
+def _indice_coluna(referencia):
+    indice = 0
+    for c in referencia:
+        if c.isdigit():
+            break
+        indice = indice * 26 + ord(c) - 64
+    return indice - 1
+
+
+def _valor(celula, strings, estilos_data, calendario):
+    tipo = celula.get('t', 'n')
+    if tipo == 'inlineStr':
+        elemento = celula.find(NS + 'is')
+        return _texto(elemento) if elemento is not None else None
+    v = celula.find(NS + 'v')
+    if v is None or v.text is None:
+        return None
+    if tipo == 's':
+        return strings[int(v.text)]
+    if tipo in ('str', 'e'):
+        return v.text
+    if tipo == 'b':
+        return v.text == '1'
+    if tipo == 'd':
+        return pd.Timestamp(v.text).to_pydatetime()
+    numero = float(v.text)
+    if int(celula.get('s', 0)) in estilos_data:
+        return from_excel(numero, calendario)
+    inteiro = int(numero)
+    return inteiro if inteiro == numero else numero
+
+
+def ler_xlsx_colunas(caminho, colunas):
+    with zipfile.ZipFile(caminho) as zf:
+        strings = _strings_compartilhadas(zf)
+        estilos_data = _estilos_de_data(zf)
+        calendario = _calendario(zf)
+        planilha = _caminho_primeira_planilha(zf)
+
+        posicoes = None
+        indices_uteis = set()
+        dados = {coluna: [] for coluna in colunas}
+        linhas_lidas = 0
+        pendentes_vazias = 0
+        ultima_linha = None
+        sheet_data = None
+        with zf.open(planilha) as f:
+            for evento, elemento in ET.iterparse(f, events=('start', 'end')):
+                if evento == 'start':
+                    if elemento.tag == NS + 'sheetData':
+                        sheet_data = elemento
+                    continue
+                if elemento.tag != NS + 'row':
+                    continue
+                numero = int(elemento.get('r', (ultima_linha or 0) + 1))
+                celulas = {}
+                outras_preenchidas = False
+                for posicao, celula in enumerate(elemento.iter(NS + 'c')):
+                    referencia = celula.get('r')
+                    indice = _indice_coluna(referencia) if referencia else posicao
+                    if posicoes is not None and indice not in indices_uteis:
+                        # Colunas não pedidas só importam para saber se a linha é vazia
+                        outras_preenchidas = outras_preenchidas or len(celula) > 0
+                        continue
+                    valor = _valor(celula, strings, estilos_data, calendario)
+                    if valor is not None and valor != '':
+                        celulas[indice] = valor
+                # Descarta as linhas já processadas para manter a memória constante
+                sheet_data.clear()
+                linhas_lidas += 1
+
+                if posicoes is None:
+                    nomes = {str(v).strip(): i for i, v in sorted(celulas.items(), reverse=True)}
+                    if all(coluna in nomes for coluna in colunas):
+                        posicoes = {coluna: nomes[coluna] for coluna in colunas}
+                        indices_uteis = set(posicoes.values())
+                    elif linhas_lidas >= LIMITE_BUSCA_CABECALHO:
+                        break
+                    ultima_linha = numero
+                    continue
+
+                # Linhas sem nenhuma célula (ou puladas no XML) entre dados
+                # viram linhas vazias, como no pd.read_excel; as do final não.
+                pendentes_vazias += numero - ultima_linha - 1
+                ultima_linha = numero
+                if not celulas and not outras_preenchidas:
+                    pendentes_vazias += 1
+                    continue
+                for _ in range(pendentes_vazias):
+                    for coluna in colunas:
+                        dados[coluna].append(None)
+                pendentes_vazias = 0
+                for coluna, i in posicoes.items():
+                    dados[coluna].append(celulas.get(i))
+
+    if posicoes is None:
+        raise ValueError(f'cabeçalho com as colunas {colunas} não encontrado nas primeiras '
+                         f'{LIMITE_BUSCA_CABECALHO} linhas de {caminho}')
+    return pd.DataFrame(dados, columns=colunas)
+
+
+def comparar_desempenho(caminho_cnm, caminho_sgp, repeticoes=3):
+    casos = [
+        ('CNM', lambda: pd.read_excel(caminho_cnm, engine='openpyxl'), lambda: ler_xlsx_colunas(caminho_cnm, COLUNAS_CNM)),
+        ('SGP', lambda: pd.read_excel(caminho_sgp, skiprows=8), lambda: ler_xlsx_colunas(caminho_sgp, COLUNAS_SGP)),
+    ]
+    for nome, atual, novo in casos:
+        tempos = []
+        for leitor in (atual, novo):
+            melhor = float('inf')
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                df = leitor()
+                melhor = min(melhor, time.perf_counter() - inicio)
+            tempos.append((melhor, len(df)))
+        (t_atual, n_atual), (t_novo, n_novo) = tempos
+        print(f'[BENCHMARK] {nome}: pd.read_excel {t_atual:.3f}s ({n_atual} linhas) | '
+              f'ler_xlsx_colunas {t_novo:.3f}s ({n_novo} linhas) | {t_atual / t_novo:.1f}x mais rápido')
+
+
+if __name__ == '__main__':
+    pasta = sys.argv[1] if len(sys.argv) > 1 else './download'
+    comparar_desempenho(os.path.join(pasta, 'Relatorio_CNM.xlsx'), os.path.join(pasta, 'Relatorio_SGP.xlsx'))
@@ -0,0 +1,194 @@
+import contextlib
+import json
+import os
+import threading
+import time
+import perfil
+
+# Métricas da execução no formato texto do Prometheus, para o coletor
+# "textfile" do node_exporter (apontado para metricas_dir). Cada processo
+# grava o próprio arquivo (<nome>.prom) com o rótulo origem=<nome>;
+# contadores e histogramas continuam de uma execução para a outra pelo
+# <nome>.json ao lado, os medidores refletem a última execução. A idade dos
+# arquivos de entrada só sai dos processos que acompanham as fontes
+# (acompanhar_fontes, usado pelo monitor), recalculada a cada gravação.
+
+metricas_dir = './metricas'
+
+PREFIXO = 'serasa_'
+LIMITES_SEGUNDOS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+METRICAS = {
+    # nome: (tipo, ajuda)
+    'execucoes_total': ('counter', 'Execuções da geração do dashboard, por resultado.'),
+    'execucao_duracao_segundos': ('histogram', 'Duração total de cada execução.'),
+    'etapa_duracao_segundos': ('histogram', 'Duração de cada etapa da execução.'),
+    'etapa_ultima_duracao_segundos': ('gauge', 'Duração da etapa na última execução.'),
+    'ultima_execucao_timestamp_segundos': ('gauge', 'Fim da última execução (epoch), por resultado.'),
+    'fonte_linhas': ('gauge', 'Linhas normalizadas de cada fonte na última leitura.'),
+    'fonte_tamanho_bytes': ('gauge', 'Tamanho do arquivo de cada fonte.'),
+    'fonte_modificacao_timestamp_segundos': ('gauge', 'Última modificação do arquivo de cada fonte (epoch).'),
+    'fonte_idade_segundos': ('gauge', 'Idade do arquivo de cada fonte, recalculada a cada gravação do monitor.'),
+    'documentos': ('gauge', 'Documentos no resultado unificado, por status.'),
+    'monitor_eventos_total': ('counter', 'Eventos de arquivo de entrada recebidos pelo monitor.'),
+    'monitor_eventos_agrupados_total': ('counter', 'Eventos absorvidos em uma reconstrução já pendente.'),
+    'monitor_reconstrucoes_total': ('counter', 'Reconstruções disparadas pelo monitor, por modo.'),
+    'monitor_reconstrucoes_canceladas_total': ('counter', 'Reconstruções interrompidas por entradas mais novas.'),
+    'monitor_falhas_total': ('counter', 'Reconstruções do monitor que terminaram com erro.'),
+}
+
+_lock = threading.RLock()
+_nome = None
+_series = {}        # (métrica, rótulos) -> valor
+_histogramas = {}   # (métrica, rótulos) -> [contagens por limite..., +Inf, soma]
+_arquivos_fonte = {}
+
+
+def _rotulos(rotulos):
+    return tuple(sorted((k, str(v)) for k, v in rotulos.items()))
+
+
+def _caminho(extensao):
+    return os.path.join(metricas_dir, f'{_nome}.{extensao}')
+
+
+def iniciar(nome):
+    # Define o arquivo deste processo e retoma contadores/histogramas anteriores
+    global _nome
+    with _lock:
+        _nome = nome
+        _series.clear()
+        _histogramas.clear()
+        try:
+            with open(_caminho('json'), encoding='utf-8') as f:
+                estado = json.load(f)
+        except (OSError, ValueError):
+            return
+        for metrica, rotulos, valor in estado.get('contadores', []):
+            _series[(metrica, tuple(map(tuple, rotulos)))] = valor
+        for metrica, rotulos, valores in estado.get('histogramas', []):
+            if len(valores) == len(LIMITES_SEGUNDOS) + 2:
+                _histogramas[(metrica, tuple(map(tuple, rotulos)))] = valores
+
+
+def incrementar(metrica, valor=1, **rotulos):
+    with _lock:
+        chave = (metrica, _rotulos(rotulos))
+        _series[chave] = _series.get(chave, 0) + valor
+
+
+def definir(metrica, valor, **rotulos):
+    with _lock:
+        _series[(metrica, _rotulos(rotulos))] = valor
+
+
+def observar(metrica, valor, **rotulos):
+    with _lock:
+        chave = (metrica, _rotulos(rotulos))
+        valores = _histogramas.setdefault(chave, [0] * (len(LIMITES_SEGUNDOS) + 2))
+        for i, limite in enumerate(LIMITES_SEGUNDOS):
+            if valor <= limite:
+                valores[i] += 1
+        valores[-2] += 1
+        valores[-1] += valor
+
+
+@contextlib.contextmanager
+def etapa(nome):
+    # Também é a etapa do perfil (--profile); devolve o info de perfil.medir
+    inicio = time.perf_counter()
+    with perfil.medir(nome) as info:
+        try:
+            yield info
+        finally:
+            duracao = time.perf_counter() - inicio
+            observar('etapa_duracao_segundos', duracao, etapa=nome)
+            definir('etapa_ultima_duracao_segundos', duracao, etapa=nome)
+
+
+def registrar_fonte(nome, caminho, linhas):
+    definir('fonte_linhas', linhas, fonte=nome)
+    try:
+        info = os.stat(caminho)
+    except OSError:
+        return
+    definir('fonte_tamanho_bytes', info.st_size, fonte=nome)
+    definir('fonte_modificacao_timestamp_segundos', info.st_mtime, fonte=nome)
+
+
+def acompanhar_fontes(caminhos):
+    # {fonte: caminho} cujos tamanho, modificação e idade são relidos a cada
+    # gravar(); para processos que ficam no ar (o monitor regrava a cada minuto)
+    with _lock:
+        _arquivos_fonte.clear()
+        _arquivos_fonte.update(caminhos)
+
+
+def registrar_status(contagem):
+    for status, quantidade in contagem.items():
+        definir('documentos', int(quantidade), status=status)
+
+
+def registrar_execucao(resultado, duracao):
+    # Fecha uma execução (sucesso/falha) e grava o arquivo
+    incrementar('execucoes_total', resultado=resultado)
+    observar('execucao_duracao_segundos', duracao)
+    definir('ultima_execucao_timestamp_segundos', time.time(), resultado=resultado)
+    gravar()
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formatar_rotulos(rotulos, extra=()):
+    pares = [('origem', _nome)] + list(rotulos) + list(extra)
+    return '{' + ','.join(f'{k}="{_escapar(v)}"' for k, v in pares) + '}'
+
+
+def gravar():
+    if _nome is None:
+        return
+    with _lock:
+        agora = time.time()
+        for chave in [c for c in _series if c[0] == 'fonte_idade_segundos']:
+            del _series[chave]
+        for nome, caminho in _arquivos_fonte.items():
+            try:
+                info = os.stat(caminho)
+            except OSError:
+                continue  # arquivo ausente (ex.: um CSV do SOA que não veio): sem idade
+            rotulos = _rotulos({'fonte': nome})
+            _series[('fonte_tamanho_bytes', rotulos)] = info.st_size
+            _series[('fonte_modificacao_timestamp_segundos', rotulos)] = info.st_mtime
+            _series[('fonte_idade_segundos', rotulos)] = agora - info.st_mtime
+
+        linhas = []
+        for metrica, (tipo, ajuda) in METRICAS.items():
+            series = sorted((r, v) for (m, r), v in _series.items() if m == metrica)
+            histogramas = sorted((r, v) for (m, r), v in _histogramas.items() if m == metrica)
+            if not series and not histogramas:
+                continue
+            linhas.append(f'# HELP {PREFIXO}{metrica} {ajuda}')
+            linhas.append(f'# TYPE {PREFIXO}{metrica} {tipo}')
+            for rotulos, valor in series:
+                linhas.append(f'{PREFIXO}{metrica}{_formatar_rotulos(rotulos)} {valor}')
+            for rotulos, valores in histogramas:
+                for limite, acumulado in zip(LIMITES_SEGUNDOS, valores):
+                    linhas.append(f'{PREFIXO}{metrica}_bucket{_formatar_rotulos(rotulos, [("le", limite)])} {acumulado}')
+                linhas.append(f'{PREFIXO}{metrica}_bucket{_formatar_rotulos(rotulos, [("le", "+Inf")])} {valores[-2]}')
+                linhas.append(f'{PREFIXO}{metrica}_sum{_formatar_rotulos(rotulos)} {valores[-1]}')
+                linhas.append(f'{PREFIXO}{metrica}_count{_formatar_rotulos(rotulos)} {valores[-2]}')
+
+        estado = {
+            'contadores': [[m, r, v] for (m, r), v in _series.items() if METRICAS[m][0] == 'counter'],
+            'histogramas': [[m, r, v] for (m, r), v in _histogramas.items()]
+        }
+
+    # Grava em arquivo temporário e troca, para o coletor nunca ler pela metade
+    os.makedirs(metricas_dir, exist_ok=True)
+    for extensao, conteudo in (('prom', '\n'.join(linhas) + '\n'), ('json', json.dumps(estado))):
+        temporario = _caminho(extensao) + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            f.write(conteudo)
+        os.replace(temporario, _caminho(extensao))
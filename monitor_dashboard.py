@@ -1,42 +1,189 @@
-
+import argparse
 import time
 import os
+import sys
+import threading
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 import subprocess
+import metricas
+from gerar_dashboard import listar_fontes
 
 WATCHED_FOLDER = './download'
 SCRIPT_TO_RUN = 'gerar_dashboard.py'
 
+EXTENSOES = ('.xlsx', '.csv')
+# Segundos sem nenhum evento na pasta antes de considerar o lote encerrado
+ESPERA_SILENCIO = 5
+INTERVALO_VERIFICACAO = 1
+# Regrava as métricas pelo menos a cada tantos segundos (idade dos arquivos)
+INTERVALO_METRICAS = 60
+
+
+def acompanhar_fontes():
+    # Arquivos de entrada presentes agora, para o monitor.prom trazer a idade de cada um
+    metricas.acompanhar_fontes({nome: caminho for nome, caminho, _ in listar_fontes(avisar=False)})
+
+
 class ChangeHandler(FileSystemEventHandler):
+    # Só registra o evento; quem decide quando reconstruir é o Coordenador
+    def __init__(self, coordenador):
+        super().__init__()
+        self.coordenador = coordenador
+
     def on_modified(self, event):
-        if event.src_path.endswith('.xlsx'):
-            print(f'[INFO] Detecção de modificação: {event.src_path}')
-            executar_script()
+        if not event.is_directory:
+            self.coordenador.registrar(event.src_path)
 
     def on_created(self, event):
-        if event.src_path.endswith('.xlsx'):
-            print(f'[INFO] Novo arquivo detectado: {event.src_path}')
-            executar_script()
-
-def executar_script():
-    print('[INFO] Executando script de geração do dashboard...')
-    result = subprocess.run(['python', SCRIPT_TO_RUN])
-    if result.returncode == 0:
-        print('[SUCESSO] Script executado com sucesso.')
-    else:
-        print('[ERRO] Houve uma falha na execução do script.')
+        if not event.is_directory:
+            self.coordenador.registrar(event.src_path)
+
+    def on_moved(self, event):
+        # O Chrome baixa em .crdownload e renomeia para o nome final
+        if not event.is_directory:
+            self.coordenador.registrar(event.dest_path)
+
+
+class Coordenador:
+    # Junta os eventos de uma rajada (vários por download) em uma única
+    # reconstrução, espera os arquivos ficarem completos e substitui uma
+    # reconstrução em andamento quando chegam entradas mais novas.
+    def __init__(self, pasta, residente=None):
+        self.pasta = pasta
+        # Com um DashboardResidente a geração roda neste processo, relendo só
+        # as fontes alteradas; eventos que chegam durante ela vão para o próximo lote
+        self.residente = residente
+        self.lock = threading.Lock()
+        self.pendentes = set()
+        self.ultimo_evento = 0.0
+        self.tamanhos = {}
+        self.processo = None
+        self.ultima_gravacao = 0.0
+
+    def registrar(self, caminho):
+        with self.lock:
+            # Qualquer atividade na pasta (inclusive .crdownload) adia a reconstrução
+            self.ultimo_evento = time.monotonic()
+            if caminho.endswith(EXTENSOES):
+                metricas.incrementar('monitor_eventos_total')
+                if self.pendentes:
+                    metricas.incrementar('monitor_eventos_agrupados_total')
+                if caminho not in self.pendentes:
+                    print(f'[INFO] Alteração detectada: {caminho}')
+                self.pendentes.add(caminho)
+
+    def download_em_andamento(self):
+        try:
+            return any(nome.endswith('.crdownload') for nome in os.listdir(self.pasta))
+        except OSError:
+            return False
+
+    def arquivos_estaveis(self, caminhos):
+        # Completo = tamanho igual ao da verificação anterior (e maior que zero)
+        estaveis = True
+        for caminho in caminhos:
+            try:
+                tamanho = os.path.getsize(caminho)
+            except OSError:
+                tamanho = None  # removido/renomeado; não segura a reconstrução
+            if tamanho is not None and (tamanho == 0 or self.tamanhos.get(caminho) != tamanho):
+                estaveis = False
+            self.tamanhos[caminho] = tamanho
+        return estaveis
+
+    def lote_pronto(self):
+        with self.lock:
+            if not self.pendentes or time.monotonic() - self.ultimo_evento < ESPERA_SILENCIO:
+                return None
+            caminhos = set(self.pendentes)
+        if self.download_em_andamento() or not self.arquivos_estaveis(caminhos):
+            return None
+        with self.lock:
+            # Eventos que chegaram durante a verificação ficam para o próximo ciclo
+            if time.monotonic() - self.ultimo_evento < ESPERA_SILENCIO:
+                return None
+            self.pendentes -= caminhos
+        return caminhos
+
+    def cancelar_em_andamento(self):
+        if self.processo is not None and self.processo.poll() is None:
+            print('[INFO] Entradas mais novas chegaram; interrompendo a geração em andamento.')
+            metricas.incrementar('monitor_reconstrucoes_canceladas_total')
+            self.processo.terminate()
+            try:
+                self.processo.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.processo.kill()
+                self.processo.wait()
+        self.processo = None
+
+    def acompanhar(self):
+        if self.processo is not None and self.processo.poll() is not None:
+            if self.processo.returncode == 0:
+                print('[SUCESSO] Script executado com sucesso.')
+            else:
+                print('[ERRO] Houve uma falha na execução do script.')
+                metricas.incrementar('monitor_falhas_total')
+            self.processo = None
+            metricas.gravar()
+
+    def executar_script(self, caminhos):
+        if self.residente is not None:
+            print(f'[INFO] Atualizando dashboard residente ({len(caminhos)} arquivo(s) alterado(s))...')
+            resultado = self.residente.atualizar(caminhos)
+            if resultado is None:
+                # Só arquivos que não são fontes (ex.: outro.csv): não houve reconstrução
+                return
+            metricas.incrementar('monitor_reconstrucoes_total', modo='residente')
+            if not resultado:
+                metricas.incrementar('monitor_falhas_total')
+            metricas.gravar()
+            return
+        self.cancelar_em_andamento()
+        print(f'[INFO] Executando script de geração do dashboard ({len(caminhos)} arquivo(s) alterado(s))...')
+        self.processo = subprocess.Popen([sys.executable, SCRIPT_TO_RUN])
+        metricas.incrementar('monitor_reconstrucoes_total', modo='subprocesso')
+        metricas.gravar()
+
+    def ciclo(self):
+        self.acompanhar()
+        caminhos = self.lote_pronto()
+        if caminhos:
+            self.executar_script(caminhos)
+        if time.monotonic() - self.ultima_gravacao >= INTERVALO_METRICAS:
+            acompanhar_fontes()
+            metricas.gravar()
+            self.ultima_gravacao = time.monotonic()
+
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Regenera o dashboard quando os arquivos de entrada mudam.')
+    parser.add_argument('--residente', action='store_true',
+                        help='mantém os quadros em memória e relê só os arquivos alterados (sem subprocesso)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='no modo residente, usa a conciliação incremental')
+    args = parser.parse_args()
+
+    metricas.iniciar('monitor')
+    residente = None
+    if args.residente:
+        from dashboard_residente import DashboardResidente
+        residente = DashboardResidente(incremental=args.incremental)
+        residente.iniciar()
+
     print(f'[MONITOR] Observando a pasta: {WATCHED_FOLDER}')
-    event_handler = ChangeHandler()
+    coordenador = Coordenador(WATCHED_FOLDER, residente)
+    event_handler = ChangeHandler(coordenador)
     observer = Observer()
     observer.schedule(event_handler, WATCHED_FOLDER, recursive=False)
     observer.start()
 
     try:
         while True:
-            time.sleep(1)
+            time.sleep(INTERVALO_VERIFICACAO)
+            coordenador.ciclo()
     except KeyboardInterrupt:
         observer.stop()
+        coordenador.cancelar_em_andamento()
     observer.join()
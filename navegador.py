@@ -0,0 +1,191 @@
+import atexit
+import os
+import shutil
+import threading
+from selenium import webdriver
+from selenium.webdriver.chromium.remote_connection import ChromiumRemoteConnection
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+
+# Configuração comum do Chrome dos exportadores (Relatorio_CNM/SGP/SOA.py):
+# fábrica de drivers (headless e enxuta por padrão, com um chromedriver
+# compartilhado), pastas de download/sessão e condições de espera.
+
+driver_path = "./chromedriver"
+download_dir = os.path.abspath("download")
+# Perfis do Chrome de cada portal, mantidos entre execuções (contêm os cookies de login)
+sessoes_dir = os.path.abspath("sessoes")
+
+ARGUMENTOS_HEADLESS = [
+    "--headless=new",
+    "--window-size=1920,1080",
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-dev-shm-usage",
+    "--mute-audio",
+    "--no-first-run"
+]
+# Padrões de URL bloqueados no modo headless (as imagens também vão pela preferência do perfil)
+RECURSOS_BLOQUEADOS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3", "*.ogg", "*.wav",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*facebook.net*", "*hotjar.com*"
+]
+# Segundos; sem isso uma página travada segura o driver.get por 300s
+TEMPO_CARREGAMENTO = 60
+TEMPO_SCRIPT = 30
+
+_servico = None
+_lock_servico = threading.Lock()
+
+
+def pasta_temporaria(portal, pasta=None):
+    # Cada exportação baixa na própria subpasta, para que downloads simultâneos
+    # de portais diferentes não se confundam; o arquivo pronto é movido para a
+    # pasta de download só no fim (o monitor não observa as subpastas)
+    temporaria = os.path.join(pasta or download_dir, f".{portal}")
+    shutil.rmtree(temporaria, ignore_errors=True)
+    os.makedirs(temporaria)
+    return temporaria
+
+
+def _opcao(nome):
+    return os.getenv(nome, "").strip().lower() in ("1", "true", "sim")
+
+
+def pasta_sessao(portal):
+    # Perfil persistido do portal quando MANTER_SESSAO=1 (no .env ou pelo
+    # --manter-sessao do baixar_dados_selenium.py); None = perfil temporário
+    if not _opcao("MANTER_SESSAO"):
+        return None
+    pasta = os.path.join(sessoes_dir, portal)
+    os.makedirs(pasta, exist_ok=True)
+    return pasta
+
+
+def modo_navegador():
+    # "visivel" (NAVEGADOR_VISIVEL=1 ou --visivel): janela maximizada e página
+    # completa, para acompanhar/depurar; senão "headless", sem janela e sem
+    # imagens, fontes, mídia e rastreadores
+    return "visivel" if _opcao("NAVEGADOR_VISIVEL") else "headless"
+
+
+def servico():
+    # Um só chromedriver por processo, iniciado no primeiro uso e compartilhado
+    # pelas exportações (inclusive as simultâneas do baixar_dados_selenium.py)
+    global _servico
+    with _lock_servico:
+        if _servico is None or _servico.process is None or _servico.process.poll() is not None:
+            _servico = Service(driver_path)
+            _servico.start()
+            atexit.register(_servico.stop)
+        return _servico
+
+
+def criar_driver(pasta_download, argumentos=(), sessao=None):
+    headless = modo_navegador() == "headless"
+    options = Options()
+    # Devolve o controle no DOMContentLoaded; os fluxos esperam o que precisam
+    options.page_load_strategy = "eager"
+    if sessao:
+        options.add_argument(f"--user-data-dir={sessao}")
+    prefs = {
+        "download.default_directory": pasta_download,
+        "download.prompt_for_download": False,
+        "download.directory_upgrade": True,
+        "safebrowsing.enabled": True
+    }
+    if headless:
+        prefs["profile.managed_default_content_settings.images"] = 2
+        for argumento in ARGUMENTOS_HEADLESS:
+            options.add_argument(argumento)
+    options.add_experimental_option("prefs", prefs)
+    for argumento in argumentos:
+        options.add_argument(argumento)
+
+    conexao = ChromiumRemoteConnection(servico().service_url, vendor_prefix="goog", browser_name="chrome")
+    driver = webdriver.Remote(command_executor=conexao, options=options)
+    try:
+        driver.set_page_load_timeout(TEMPO_CARREGAMENTO)
+        driver.set_script_timeout(TEMPO_SCRIPT)
+        if headless:
+            _cdp(driver, "Network.enable", {})
+            _cdp(driver, "Network.setBlockedURLs", {"urls": RECURSOS_BLOQUEADOS})
+            _cdp(driver, "Page.setDownloadBehavior", {"behavior": "allow", "downloadPath": pasta_download})
+        else:
+            driver.maximize_window()
+    except Exception:
+        driver.quit()
+        raise
+    return driver
+
+
+def _cdp(driver, comando, parametros):
+    return driver.execute("executeCdpCommand", {"cmd": comando, "params": parametros})
+
+
+def mover_para(caminho, pasta, nome):
+    # Troca atômica: quem observa a pasta nunca vê o arquivo pela metade
+    destino = os.path.join(pasta, nome)
+    os.replace(caminho, destino)
+    return destino
+
+
+def salvar_pagina(driver, nome):
+    with open(nome, "w", encoding="utf-8") as f:
+        f.write(driver.page_source)
+
+
+# ==== Condições de espera (para WebDriverWait.until) ====
+
+def pagina_ociosa(driver):
+    # Documento carregado e sem requisições jQuery pendentes (quando a página usa jQuery)
+    return driver.execute_script(
+        "return document.readyState === 'complete' && (!window.jQuery || window.jQuery.active === 0);")
+
+
+class contagem_estavel:
+    # Quantidade de elementos do localizador igual (e >= minimo) em "leituras"
+    # consultas seguidas: a grade terminou de preencher
+    def __init__(self, localizador, leituras=3, minimo=1):
+        self.localizador = localizador
+        self.leituras = leituras
+        self.minimo = minimo
+        self.anterior = None
+        self.iguais = 0
+
+    def __call__(self, driver):
+        quantidade = len(driver.find_elements(*self.localizador))
+        if quantidade == self.anterior:
+            self.iguais += 1
+        else:
+            self.anterior, self.iguais = quantidade, 1
+        return quantidade >= self.minimo and self.iguais >= self.leituras
+
+
+def sessao_ativa(driver, logado, formulario, espera=10):
+    # Na página protegida já aberta, vê o que aparece primeiro: um elemento de
+    # quem está logado ou o formulário de login (sessão ausente ou expirada)
+    try:
+        WebDriverWait(driver, espera).until(EC.any_of(
+            EC.presence_of_element_located(logado),
+            EC.presence_of_element_located(formulario)))
+    except TimeoutException:
+        return False
+    return bool(driver.find_elements(*logado))
+
+
+def clicar_ate(driver, elemento, condicao, espera=3, tentativas=2):
+    # Clica e espera a condição; alguns menus/abas dos portais ignoram o
+    # primeiro clique, então repete o clique só quando ela não acontece
+    for tentativa in range(tentativas):
+        elemento.click()
+        try:
+            return WebDriverWait(driver, espera).until(condicao)
+        except TimeoutException:
+            if tentativa == tentativas - 1:
+                raise
@@ -0,0 +1,193 @@
+import gzip
+import hashlib
+import html
+import io
+import json
+import os
+import re
+import shutil
+import pandas as pd
+from escritores import escrever_dados_dashboard, escrever_tabela_vazia, substituir_ao_final, SCRIPT_COLUNAS_DADOS
+from resumo import calcular_resumo, painel_resumo_html
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Dashboards estáticos menores: uma página por Status e uma por mês da Data,
+# mais um índice com as contagens. Cada página é só o cabeçalho da tabela;
+# as linhas ficam num <página>.dados.js ao lado, desenhado pelo DataTables
+# com deferRender como no dashboard principal. Páginas e dados vão junto com
+# as versões .gz/.br pré-comprimidas, e o hash das linhas de cada página fica
+# no manifesto para não regravar o que não mudou desde a última execução.
+
+VERSAO_PAGINAS = 2
+ARQUIVO_MANIFESTO = 'fatias.json'
+ARQUIVO_INDICE = 'index.html'
+# A qualidade padrão do brotli (11) leva centenas de vezes mais que a 5 para
+# quase nada de ganho; com dezenas de páginas isso viraria minutos
+QUALIDADE_BROTLI = 5
+TAMANHO_BLOCO_COMPRESSAO = 1 << 20
+
+
+def _slug(texto):
+    return re.sub(r'[^0-9A-Za-z_-]+', '_', str(texto).strip()) or '_'
+
+
+def particionar(df):
+    # (arquivo, título, linhas) de cada página; status e meses em ordem
+    for status, fatia in df.groupby('Status', observed=True, sort=True):
+        yield f'status_{_slug(status)}.html', f'Status {status}', fatia
+    periodos = df['Data'].dt.to_period('M')
+    for periodo, fatia in df.groupby(periodos, sort=True):
+        yield f"mes_{periodo.strftime('%Y-%m')}.html", f"Mês {periodo.strftime('%m/%Y')}", fatia
+    sem_data = periodos.isna()
+    if sem_data.any():
+        yield 'mes_sem-data.html', 'Sem data', df[sem_data]
+
+
+def hash_fatia(fatia):
+    h = hashlib.blake2b(str(VERSAO_PAGINAS).encode('utf-8'), digest_size=16)
+    h.update(pd.util.hash_pandas_object(fatia, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def arquivo_dados(arquivo):
+    return os.path.splitext(arquivo)[0] + '.dados.js'
+
+
+def _pagina(titulo, escrever_corpo, dados=None):
+    f = io.StringIO()
+    f.write(f"""<!DOCTYPE html>
+<html lang='pt-BR'>
+<head>
+    <meta charset='UTF-8'><title>{html.escape(titulo)}</title>
+    <link rel='stylesheet' href='https://cdn.datatables.net/1.13.4/css/jquery.dataTables.min.css'>
+    <style>
+        body {{ font-family: Arial; text-align: center; }}
+        table {{ margin: 0 auto; width: 90%; }}
+        table.resumo {{ width: auto; margin: 10px auto; border-collapse: collapse; }}
+        table.resumo td, table.resumo th {{ border: 1px solid #ccc; padding: 2px 10px; }}
+    </style>
+</head>
+<body>
+    <h2>{html.escape(titulo)}</h2>
+""")
+    escrever_corpo(f)
+    if dados is not None:
+        f.write(f"""    <script src='https://code.jquery.com/jquery-3.7.0.min.js'></script>
+    <script src='https://cdn.datatables.net/1.13.4/js/jquery.dataTables.min.js'></script>
+    <script src='{html.escape(dados)}'></script>
+    <script>
+{SCRIPT_COLUNAS_DADOS}
+        $(document).ready(function() {{
+            const dados = window.DADOS_DASHBOARD;
+            $('#tabela').DataTable({{
+                data: dados.linhas,
+                deferRender: true,
+                columns: colunasDados(dados),
+                pageLength: 25,
+                language: {{ url: '//cdn.datatables.net/plug-ins/1.13.4/i18n/pt-BR.json' }}
+            }});
+        }});
+    </script>
+""")
+    f.write('    <footer>VERDE = Presente | VERMELHO = Ausente</footer>\n</body>\n</html>\n')
+    return f.getvalue().encode('utf-8')
+
+
+def _indice(paginas, resumo):
+    def corpo(f):
+        f.write(f'    {painel_resumo_html(resumo)}\n    <ul>\n')
+        for arquivo, titulo, quantidade in paginas:
+            f.write(f"        <li><a href='{arquivo}'>{html.escape(titulo)}</a> ({quantidade})</li>\n")
+        f.write('    </ul>\n')
+    return _pagina('Dashboard Unificado - páginas por Status e mês', corpo)
+
+
+def brotli_disponivel():
+    return brotli is not None
+
+
+def _arquivos(caminho):
+    return [caminho, caminho + '.gz', caminho + '.br']
+
+
+def _comprimir(caminho):
+    # Lê o arquivo já gravado em blocos, sem montar o conteúdo todo em memória
+    with substituir_ao_final(caminho + '.gz') as temporario, open(caminho, 'rb') as origem, \
+            open(temporario, 'wb') as destino:
+        # mtime=0 deixa o .gz igual para o mesmo conteúdo
+        with gzip.GzipFile(fileobj=destino, mode='wb', compresslevel=9, mtime=0) as gz:
+            shutil.copyfileobj(origem, gz, TAMANHO_BLOCO_COMPRESSAO)
+    with substituir_ao_final(caminho + '.br') as temporario, open(caminho, 'rb') as origem, \
+            open(temporario, 'wb') as destino:
+        compressor = brotli.Compressor(quality=QUALIDADE_BROTLI)
+        for bloco in iter(lambda: origem.read(TAMANHO_BLOCO_COMPRESSAO), b''):
+            destino.write(compressor.process(bloco))
+        destino.write(compressor.finish())
+
+
+def _gravar(caminho, conteudo):
+    with substituir_ao_final(caminho) as temporario, open(temporario, 'wb') as f:
+        f.write(conteudo)
+    _comprimir(caminho)
+
+
+def _gravar_fatia(caminho, titulo, fatia):
+    dados = arquivo_dados(caminho)
+    escrever_dados_dashboard(fatia, dados)
+    _comprimir(dados)
+    _gravar(caminho, _pagina(titulo, lambda f: escrever_tabela_vazia(f, fatia), os.path.basename(dados)))
+
+
+def _carregar_manifesto(pasta):
+    try:
+        with open(os.path.join(pasta, ARQUIVO_MANIFESTO), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def gerar_paginas_fatiadas(df, pasta):
+    if not brotli_disponivel():
+        raise RuntimeError("as páginas fatiadas precisam do pacote 'brotli' (pip install brotli) para gravar os .br")
+    os.makedirs(pasta, exist_ok=True)
+    anterior = _carregar_manifesto(pasta)
+    manifesto = {}
+    paginas = []
+    gravadas = 0
+
+    def gravar_se_mudou(arquivo, hash_conteudo, gravar, com_dados=False):
+        nonlocal gravadas
+        manifesto[arquivo] = hash_conteudo
+        caminho = os.path.join(pasta, arquivo)
+        existentes = _arquivos(caminho) + (_arquivos(arquivo_dados(caminho)) if com_dados else [])
+        if anterior.get(arquivo) == hash_conteudo and all(os.path.exists(c) for c in existentes):
+            return
+        gravar(caminho)
+        gravadas += 1
+
+    for arquivo, titulo, fatia in particionar(df):
+        paginas.append((arquivo, titulo, len(fatia)))
+        gravar_se_mudou(arquivo, hash_fatia(fatia),
+                        lambda caminho: _gravar_fatia(caminho, titulo, fatia), com_dados=True)
+
+    indice = _indice(paginas, calcular_resumo(df))
+    gravar_se_mudou(ARQUIVO_INDICE, hashlib.blake2b(indice, digest_size=16).hexdigest(),
+                    lambda caminho: _gravar(caminho, indice))
+
+    # Páginas que deixaram de existir (ex.: um mês que sumiu da carteira)
+    for arquivo in set(anterior) - set(manifesto):
+        base = os.path.join(pasta, arquivo)
+        for caminho in _arquivos(base) + _arquivos(arquivo_dados(base)):
+            if os.path.exists(caminho):
+                os.remove(caminho)
+
+    with substituir_ao_final(os.path.join(pasta, ARQUIVO_MANIFESTO)) as temporario, \
+            open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=1, sort_keys=True)
+    print(f'[INFO] Páginas por Status/mês em {pasta}: {gravadas} gravada(s), '
+          f'{len(manifesto) - gravadas} sem alteração.')
+    return gravadas
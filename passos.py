@@ -0,0 +1,89 @@
+import contextlib
+import json
+import os
+import statistics
+import sys
+import time
+import metricas
+
+# Tempo de cada passo da navegação dos exportadores (login, menu, pesquisa,
+# exportação, download...). Cada sessão vira uma linha em passos/<portal>.jsonl
+# e cada passo também entra nas métricas como a etapa "<portal>:<passo>".
+# "python passos.py" mostra a mediana de cada passo nas últimas sessões,
+# separada pelo modo do navegador (headless x visível) para compará-los.
+
+passos_dir = './passos'
+
+SESSOES_RESUMO = 20
+
+
+class Passos:
+    def __init__(self, portal, modo=None):
+        self.portal = portal
+        self.modo = modo
+        self.registros = []
+        self.inicio = time.perf_counter()
+
+    @contextlib.contextmanager
+    def medir(self, passo):
+        inicio = time.perf_counter()
+        resultado = 'falha'
+        try:
+            with metricas.etapa(f'{self.portal}:{passo}'):
+                yield
+            resultado = 'ok'
+        finally:
+            duracao = time.perf_counter() - inicio
+            self.registros.append({'passo': passo, 'segundos': round(duracao, 3), 'resultado': resultado})
+            print(f'[TEMPO] {passo}: {duracao:.1f}s')
+
+    def gravar(self):
+        total = time.perf_counter() - self.inicio
+        sessao = {
+            'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'portal': self.portal,
+            'modo': self.modo,
+            'resultado': 'ok' if all(r['resultado'] == 'ok' for r in self.registros) else 'falha',
+            'total_s': round(total, 3),
+            'passos': self.registros
+        }
+        os.makedirs(passos_dir, exist_ok=True)
+        with open(os.path.join(passos_dir, f'{self.portal}.jsonl'), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(sessao, ensure_ascii=False) + '\n')
+        detalhes = ' | '.join(f"{r['passo']} {r['segundos']:.1f}s" for r in self.registros)
+        print(f'[TEMPO] {self.portal} em {total:.1f}s: {detalhes}')
+
+
+def resumir(portal, ultimas=SESSOES_RESUMO):
+    # Mediana de cada passo nas últimas sessões bem-sucedidas do portal, por modo
+    try:
+        with open(os.path.join(passos_dir, f'{portal}.jsonl'), encoding='utf-8') as f:
+            sessoes = [json.loads(linha) for linha in f if linha.strip()]
+    except OSError:
+        print(f'[AVISO] Nenhuma sessão registrada para {portal}.')
+        return
+    por_modo = {}
+    for sessao in sessoes:
+        if sessao['resultado'] == 'ok':
+            por_modo.setdefault(sessao.get('modo') or '-', []).append(sessao)
+    if not por_modo:
+        print(f'[AVISO] Nenhuma sessão bem-sucedida registrada para {portal}.')
+        return
+    for modo, sessoes in por_modo.items():
+        sessoes = sessoes[-ultimas:]
+        tempos = {}
+        for sessao in sessoes:
+            for registro in sessao['passos']:
+                tempos.setdefault(registro['passo'], []).append(registro['segundos'])
+        print(f"[TEMPO] {portal} ({modo}): mediana de {len(sessoes)} sessão(ões), total "
+              f"{statistics.median(s['total_s'] for s in sessoes):.1f}s")
+        for passo, valores in tempos.items():
+            print(f'[TEMPO]   {passo}: {statistics.median(valores):.1f}s (máx. {max(valores):.1f}s)')
+
+
+if __name__ == '__main__':
+    portais = sys.argv[1:]
+    if not portais and os.path.isdir(passos_dir):
+        portais = sorted(nome[:-len('.jsonl')] for nome in os.listdir(passos_dir) if nome.endswith('.jsonl'))
+    for portal in portais:
+        resumir(portal)
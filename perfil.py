@@ -0,0 +1,132 @@
+import contextlib
+import cProfile
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+# Perfil por etapa da geração (--profile): tempo de relógio, tempo de CPU,
+# pico de memória alocada pelo Python (tracemalloc) e linhas processadas,
+# com dump opcional do cProfile de cada etapa de primeiro nível. O relatório
+# JSON pode ser comparado entre versões com "python perfil.py antigo.json novo.json".
+
+perfil_dir = './perfil'
+
+_ativo = False
+_cprofile = False
+_etapas = []
+_pilha = []
+
+
+def ativar(cprofile=False):
+    global _ativo, _cprofile
+    _ativo = True
+    _cprofile = cprofile
+    _etapas.clear()
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+@contextlib.contextmanager
+def medir(nome):
+    # O dicionário devolvido aceita informações da etapa (ex.: info['linhas'])
+    info = {}
+    if not _ativo:
+        yield info
+        return
+
+    atual, pico = tracemalloc.get_traced_memory()
+    if _pilha:
+        # O reset abaixo apagaria o pico da etapa de fora; guarda antes
+        _pilha[-1]['pico'] = max(_pilha[-1]['pico'], pico)
+    tracemalloc.reset_peak()
+    quadro = {'pico': atual, 'base': atual}
+    _pilha.append(quadro)
+
+    # Só um cProfile pode estar ativo por vez: apenas etapas de primeiro nível
+    perfilador = cProfile.Profile() if _cprofile and len(_pilha) == 1 else None
+    registro = {'etapa': nome, 'nivel': len(_pilha) - 1}
+    _etapas.append(registro)
+    ordem = len(_etapas)
+    inicio_relogio = time.perf_counter()
+    inicio_cpu = time.process_time()
+    if perfilador is not None:
+        perfilador.enable()
+    try:
+        yield info
+    finally:
+        if perfilador is not None:
+            perfilador.disable()
+        relogio = time.perf_counter() - inicio_relogio
+        cpu = time.process_time() - inicio_cpu
+        _pilha.pop()
+        pico = max(quadro['pico'], tracemalloc.get_traced_memory()[1])
+        if _pilha:
+            _pilha[-1]['pico'] = max(_pilha[-1]['pico'], pico)
+        registro.update({
+            'relogio_s': round(relogio, 4),
+            'cpu_s': round(cpu, 4),
+            'pico_memoria_mb': round((pico - quadro['base']) / 2 ** 20, 2),
+            **info
+        })
+        if perfilador is not None:
+            os.makedirs(perfil_dir, exist_ok=True)
+            caminho = os.path.join(perfil_dir, f"{ordem:02d}_{nome.replace(':', '_')}.prof")
+            perfilador.dump_stats(caminho)
+            registro['cprofile'] = caminho
+
+
+def gravar_relatorio(caminho, **contexto):
+    import pandas as pd
+    relatorio = {
+        'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        **contexto,
+        'etapas': _etapas
+    }
+    pasta = os.path.dirname(caminho)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    print(f'[PERFIL] Relatório gravado em {caminho}')
+    for etapa in _etapas:
+        recuo = '  ' * etapa['nivel']
+        linhas = f" | {etapa['linhas']} linhas" if 'linhas' in etapa else ''
+        print(f"[PERFIL] {recuo}{etapa['etapa']}: {etapa['relogio_s']:.3f}s relógio | {etapa['cpu_s']:.3f}s CPU | "
+              f"pico {etapa['pico_memoria_mb']:.1f} MB{linhas}")
+
+
+def comparar_relatorios(caminho_antigo, caminho_novo):
+    # Diferença por etapa entre dois relatórios (etapas repetidas são somadas)
+    def totais(caminho):
+        with open(caminho, encoding='utf-8') as f:
+            etapas = json.load(f)['etapas']
+        resultado = {}
+        for etapa in etapas:
+            soma = resultado.setdefault(etapa['etapa'], {'relogio_s': 0.0, 'cpu_s': 0.0, 'pico_memoria_mb': 0.0})
+            soma['relogio_s'] += etapa['relogio_s']
+            soma['cpu_s'] += etapa['cpu_s']
+            soma['pico_memoria_mb'] = max(soma['pico_memoria_mb'], etapa['pico_memoria_mb'])
+        return resultado
+
+    antigo, novo = totais(caminho_antigo), totais(caminho_novo)
+    for nome in list(dict.fromkeys([*antigo, *novo])):
+        a = antigo.get(nome)
+        n = novo.get(nome)
+        if a is None or n is None:
+            print(f"[PERFIL] {nome}: só no {'novo' if a is None else 'antigo'}")
+            continue
+        variacao = (n['relogio_s'] / a['relogio_s'] - 1) * 100 if a['relogio_s'] else 0.0
+        print(f"[PERFIL] {nome}: {a['relogio_s']:.3f}s -> {n['relogio_s']:.3f}s ({variacao:+.0f}%) | "
+              f"pico {a['pico_memoria_mb']:.1f} -> {n['pico_memoria_mb']:.1f} MB")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print('Uso: python perfil.py antigo.json novo.json')
+        sys.exit(2)
+    comparar_relatorios(sys.argv[1], sys.argv[2])
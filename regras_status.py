@@ -0,0 +1,67 @@
+import itertools
+import numpy as np
+import pandas as pd
+
+QUALQUER = None
+
+TIPOS_CNM = ['INCLUSAO', 'EXCLUSAO']
+FONTES_SOA = ['Ativas', 'Baixadas', 'Pendentes', 'Determinacao', 'Erros']
+
+# Tabela de decisão do status. A primeira regra que casar vence; QUALQUER
+# casa com qualquer valor. Tipo CNM é comparado já sem espaços e em
+# maiúsculas; fonte SOA é a fonte da primeira linha SOA do documento.
+#
+#  CNM       SOA       SGP       Tipo CNM    Fonte SOA -> Status
+REGRAS_STATUS = [
+    (True,     QUALQUER, True,     'INCLUSAO', QUALQUER, 'NEGATIVADO'),
+    (True,     QUALQUER, False,    'INCLUSAO', QUALQUER, 'ERRO'),
+    (True,     QUALQUER, True,     'EXCLUSAO', QUALQUER, 'ERRO'),
+    (True,     QUALQUER, False,    'EXCLUSAO', QUALQUER, 'BAIXADO'),
+    (QUALQUER, QUALQUER, QUALQUER, QUALQUER,   QUALQUER, 'ERRO'),
+]
+
+
+def _casa(padrao, valor):
+    return padrao is QUALQUER or padrao == valor
+
+
+def compilar_regras(regras):
+    # Avalia a tabela para todas as combinações possíveis de chave e devolve
+    # um array de códigos indexado por (cnm, soa, sgp, tipo, fonte), junto com
+    # as categorias de status. Índices fora das listas conhecidas
+    # (len(TIPOS_CNM), len(FONTES_SOA)) representam "outro".
+    status = list(dict.fromkeys(regra[5] for regra in regras))
+    tipos = TIPOS_CNM + ['*']
+    fontes = FONTES_SOA + ['*']
+    tabela = np.empty((2, 2, 2, len(tipos), len(fontes)), dtype=np.int8)
+    for chave in itertools.product([0, 1], [0, 1], [0, 1], range(len(tipos)), range(len(fontes))):
+        cnm, soa, sgp, i_tipo, i_fonte = chave
+        valores = (bool(cnm), bool(soa), bool(sgp), tipos[i_tipo] if cnm else '*', fontes[i_fonte] if soa else '*')
+        for regra in regras:
+            if all(_casa(padrao, valor) for padrao, valor in zip(regra[:5], valores)):
+                tabela[chave] = status.index(regra[5])
+                break
+        else:
+            raise ValueError(f"[ERRO] Nenhuma regra de status cobre a combinação {valores}")
+    return tabela, status
+
+
+TABELA_STATUS, CATEGORIAS_STATUS = compilar_regras(REGRAS_STATUS)
+
+
+def _indice(valores, conhecidos):
+    indices = pd.Index(conhecidos).get_indexer(valores)
+    return np.where(indices < 0, len(conhecidos), indices)
+
+
+def classificar_status(presente_cnm, presente_soa, presente_sgp, tipo_cnm, fonte_soa):
+    tipo = pd.Series(tipo_cnm).astype(str).str.strip().str.upper()
+    fonte = pd.Series(fonte_soa, dtype=object)
+    codigos = TABELA_STATUS[
+        np.asarray(presente_cnm, dtype=int),
+        np.asarray(presente_soa, dtype=int),
+        np.asarray(presente_sgp, dtype=int),
+        _indice(tipo, TIPOS_CNM),
+        _indice(fonte, FONTES_SOA)
+    ]
+    return pd.Categorical.from_codes(codigos, categories=CATEGORIAS_STATUS)
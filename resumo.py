@@ -0,0 +1,61 @@
+import html
+import json
+import pandas as pd
+from conciliacao import ORIGENS, PRESENCA_CNM, PRESENCA_SOA, PRESENCA_SGP
+
+# Facetas e totais do resultado calculados aqui, uma vez, e embutidos no
+# HTML: os filtros e o painel do dashboard não precisam varrer as linhas
+# no navegador.
+
+SEM_DATA = '-'
+
+
+def _contagens(serie):
+    contagem = serie.astype('category').value_counts(sort=False)
+    return [[str(nome), int(qtd)] for nome, qtd in sorted(contagem.items(), key=lambda i: str(i[0])) if qtd]
+
+
+def calcular_resumo(df):
+    status = df['Status'].astype('category')
+    periodos = df['Data'].dt.to_period('M')
+    meses = periodos.value_counts(sort=False).sort_index()
+    rotulos = {periodo: periodo.strftime('%m/%Y') for periodo in meses.index}
+
+    local = df['Local'].to_numpy()
+    presenca = pd.DataFrame({
+        origem: (local & bit) > 0
+        for origem, bit in zip(ORIGENS, [PRESENCA_CNM, PRESENCA_SOA, PRESENCA_SGP])
+    }, index=df.index)
+    por_origem = presenca.groupby(status, observed=True).sum()
+    # Linhas sem data contam no mês SEM_DATA, como na faceta 'meses'
+    por_mes = pd.crosstab(status, periodos.map(rotulos).fillna(SEM_DATA))
+
+    sem_data = int(periodos.isna().sum())
+    return {
+        'total': int(len(df)),
+        'status': _contagens(status),
+        'tipos': _contagens(df['Tipo']),
+        'meses': [[rotulos[p], int(qtd)] for p, qtd in meses.items()] + ([[SEM_DATA, sem_data]] if sem_data else []),
+        'origens': {origem: int(presenca[origem].sum()) for origem in ORIGENS},
+        'status_origem': {str(s): [int(v) for v in linha] for s, linha in por_origem.iterrows()},
+        'status_mes': {str(s): {m: int(v) for m, v in linha.items() if v} for s, linha in por_mes.iterrows()}
+    }
+
+
+def resumo_json(resumo):
+    # Seguro para ir dentro de <script> inline
+    return json.dumps(resumo, ensure_ascii=False).replace('</', '<\\/')
+
+
+def painel_resumo_html(resumo):
+    # Tabela Status x origem (quantos documentos de cada status estão em cada fonte)
+    cabecalho = ''.join(f'<th>{o}</th>' for o in ORIGENS)
+    linhas = ''.join(
+        f"<tr><td>{html.escape(nome)}</td><td>{qtd}</td>"
+        + ''.join(f'<td>{v}</td>' for v in resumo['status_origem'].get(nome, [0] * len(ORIGENS)))
+        + '</tr>'
+        for nome, qtd in resumo['status']
+    )
+    total = ''.join(f"<td>{resumo['origens'][o]}</td>" for o in ORIGENS)
+    return (f"<table class='resumo'><thead><tr><th>Status</th><th>Total</th>{cabecalho}</tr></thead>"
+            f"<tbody>{linhas}</tbody><tfoot><tr><th>Total</th><td>{resumo['total']}</td>{total}</tr></tfoot></table>")
@@ -0,0 +1,45 @@
+import contextlib
+import io
+import pytest
+import benchmark as bench
+import gerar_dashboard as gd
+import metricas
+
+# Os casos do benchmark.py como testes do pytest-benchmark, sobre os dados
+# sintéticos de 10k documentos (gerados em uma pasta temporária):
+#   python -m pytest tests/test_benchmark.py --benchmark-autosave
+#   python -m pytest tests/test_benchmark.py --benchmark-compare --benchmark-compare-fail=min:25%
+# A linha de base versionada em benchmarks/baseline.json é conferida pelo
+# próprio benchmark.py (python benchmark.py --tamanho 10k).
+
+pytest.importorskip('pytest_benchmark')
+
+TAMANHO = '10k'
+
+
+@pytest.fixture(scope='module')
+def casos(tmp_path_factory):
+    # preparar() aponta o gerar_dashboard e as métricas para a pasta sintética;
+    # tudo volta ao normal no fim do módulo
+    with pytest.MonkeyPatch.context() as mp:
+        for nome in ('caminho_dir', 'caminho_cnm', 'caminho_sgp', 'saida_dir'):
+            mp.setattr(gd, nome, getattr(gd, nome))
+        mp.setattr(metricas, 'metricas_dir', metricas.metricas_dir)
+        mp.setattr(metricas, '_nome', metricas._nome)
+        mp.setattr(bench, 'sintetico_dir', str(tmp_path_factory.mktemp('sintetico')))
+        with contextlib.redirect_stdout(io.StringIO()):
+            bench.preparar(TAMANHO)
+            quadros = gd.carregar_dados(usar_cache=False, workers=1)
+        yield bench.casos(*quadros)
+
+
+@pytest.mark.parametrize('caso', bench.CASOS)
+def test_benchmark(benchmark, casos, caso):
+    funcao = casos[caso]
+
+    def executar():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return funcao()
+
+    benchmark.group = TAMANHO
+    benchmark.pedantic(executar, rounds=bench.REPETICOES, iterations=1)
@@ -0,0 +1,235 @@
+import html
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+import gerar_dashboard as gd
+from conciliacao import conciliar, renderizar_saida
+from dados_sinteticos import gerar_dados_sinteticos
+
+# Compara a conciliação atual (leitores + conciliar) com uma cópia do laço
+# original por documento, lendo os mesmos arquivos dos dois jeitos.
+
+
+# ==== Implementação original (cópia do gerar_dashboard.py de antes das otimizações) ====
+
+def _deduplicar_colunas(cols):
+    vistos = {}
+    novas = []
+    for col in cols:
+        vistos[col] = vistos.get(col, 0) + 1
+        novas.append(col if vistos[col] == 1 else f"{col}.{vistos[col] - 1}")
+    return novas
+
+
+def _ler_soa_original(nome, caminho_arquivo):
+    df = pd.read_csv(caminho_arquivo, encoding="utf-8")
+    cols = [html.unescape(col).replace('+ACI-', '').replace('+AC0-', '-').replace('"', '').strip() for col in df.columns]
+    if len(set(cols)) < len(cols):
+        cols = _deduplicar_colunas(cols)
+    df.columns = cols
+    df = df.rename(columns={
+        'Documento': 'documento',
+        'Devedor': 'devedor',
+        'Unique ID': 'Unique ID',
+        'Data Inclusão': 'data',
+        'Data Inclusao': 'data',
+        'Data Exclusão': 'data'
+    })
+    df = df.loc[:, ~df.columns.duplicated()]
+    df['documento'] = (df['documento'].astype(str).str.replace(r'\.0$', '', regex=True)
+                       .str.replace(r'\D', '', regex=True).str.strip())
+    df['fonte'] = nome
+    return df
+
+
+def carregar_original(pasta):
+    cnm_df = pd.read_excel(os.path.join(pasta, 'Relatorio_CNM.xlsx'), engine='openpyxl')
+    sgp_df = pd.read_excel(os.path.join(pasta, 'Relatorio_SGP.xlsx'), skiprows=8)
+    cnm_df['Documento'] = cnm_df['Documento'].astype(str).str.replace(r'\D', '', regex=True)
+    sgp_df['CPF/CNPJ'] = sgp_df['CPF/CNPJ'].astype(str).str.replace(r'\D', '', regex=True)
+    lista_soa = []
+    for nome, arquivo in gd.arquivos_soa.items():
+        caminho = os.path.join(pasta, arquivo)
+        if os.path.exists(caminho):
+            lista_soa.append(_ler_soa_original(nome, caminho))
+    soa_df = (pd.concat(lista_soa, ignore_index=True) if lista_soa
+              else pd.DataFrame(columns=["documento", "devedor", "data", "fonte", "Unique ID"]))
+    return cnm_df, sgp_df, soa_df
+
+
+def _determinar_status_original(presente_sgp, tipo, fontes):
+    tipo = tipo.strip().upper()
+    if tipo == "INCLUSAO":
+        return "NEGATIVADO" if presente_sgp else "ERRO"
+    elif tipo == "EXCLUSAO":
+        return "ERRO" if presente_sgp else "BAIXADO"
+    else:
+        return "ERRO"
+
+
+def conciliar_original(cnm_df, sgp_df, soa_df):
+    documentos = set(cnm_df['Documento']) | set(soa_df['documento']) | set(sgp_df['CPF/CNPJ'])
+
+    dados = []
+    for doc in documentos:
+        row_cnm = cnm_df[cnm_df['Documento'] == doc]
+        row_sgp = sgp_df[sgp_df['CPF/CNPJ'] == doc]
+        row_soa = soa_df[soa_df['documento'] == doc]
+
+        presente_sgp = not row_sgp.empty
+        fontes = list(row_soa['fonte'].unique()) if not row_soa.empty else []
+
+        if not row_cnm.empty:
+            tipo = row_cnm['Tipo'].values[0]
+            data = pd.to_datetime(row_cnm['Data / Hora'].values[0], dayfirst=True).strftime('%d/%m/%Y %H:%M')
+            fontes.append('CNM' if tipo == 'INCLUSAO' else 'CNM_EXCLUSAO')
+        elif not row_soa.empty:
+            tipo = row_soa['fonte'].values[0]
+            data = row_soa['data'].values[0]
+        else:
+            tipo = "-"
+            data = "-"
+
+        nome = row_soa['devedor'].values[0] if not row_soa.empty else "-"
+        id_val = row_soa['Unique ID'].values[0] if 'Unique ID' in row_soa and not row_soa['Unique ID'].isnull().all() else "-"
+
+        local = " | ".join([
+            f"<span style='color:{'green' if not row.empty else 'red'}'>{origem}</span>"
+            for origem, row in [('CNM', row_cnm), ('SOA', row_soa), ('SGP', row_sgp)]
+        ])
+
+        status = _determinar_status_original(presente_sgp, tipo, fontes)
+
+        dados.append({
+            "ID": id_val,
+            "Documento": doc,
+            "Nome": nome,
+            "Data": data,
+            "Tipo": tipo,
+            "Local": local,
+            "Status": status
+        })
+
+    return pd.DataFrame(dados, columns=["ID", "Documento", "Nome", "Data", "Tipo", "Local", "Status"])
+
+
+# ==== Implementação atual ====
+
+def conciliar_atual(pasta):
+    quadros = {'CNM': gd.ler_cnm(os.path.join(pasta, 'Relatorio_CNM.xlsx')),
+               'SGP': gd.ler_sgp(os.path.join(pasta, 'Relatorio_SGP.xlsx'))}
+    for nome, arquivo in gd.arquivos_soa.items():
+        caminho = os.path.join(pasta, arquivo)
+        if os.path.exists(caminho):
+            quadros[nome] = gd.ler_e_normalizar_soa(nome, caminho)
+    return renderizar_saida(conciliar(*gd.montar_quadros(quadros)))
+
+
+def comparar(pasta, esperado=None):
+    esperado = conciliar_original(*carregar_original(pasta)) if esperado is None else esperado
+    esperado = esperado.sort_values('Documento', ignore_index=True)
+    obtido = conciliar_atual(pasta).sort_values('Documento', ignore_index=True)
+    pd.testing.assert_frame_equal(obtido.astype(object), esperado.astype(object), check_dtype=False)
+    return obtido
+
+
+# ==== Arquivos de entrada montados à mão ====
+
+def escrever_cnm(pasta, linhas):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(['Id', 'Documento', 'Tipo', 'Data / Hora'])
+    for i, (documento, tipo, data) in enumerate(linhas, start=1):
+        ws.append([i, documento, tipo, data])
+    wb.save(os.path.join(pasta, 'Relatorio_CNM.xlsx'))
+
+
+def escrever_sgp(pasta, documentos):
+    wb = Workbook()
+    ws = wb.active
+    for linha in [['Relatório de Clientes'], [], [], [], [], [], [], []]:
+        ws.append(linha)
+    ws.append(['Código', 'CPF/CNPJ', 'Nome/Razão Social'])
+    for i, documento in enumerate(documentos, start=1):
+        ws.append([i, documento, f'Cliente {i}'])
+    wb.save(os.path.join(pasta, 'Relatorio_SGP.xlsx'))
+
+
+def escrever_soa(pasta, nome, linhas):
+    # Cabeçalho como na exportação real: +ACI-, entidades HTML e Documento repetido
+    df = pd.DataFrame(linhas, columns=['+ACI-Unique ID+ACI-', '+ACI-Documento+ACI-', '+ACI-Devedor+ACI-',
+                                       '+ACI-Data Inclus&atilde;o+ACI-'])
+    df['+ACI-Documento+ACI-.1'] = '00000000000191'
+    df.to_csv(os.path.join(pasta, gd.arquivos_soa[nome]), index=False, encoding='utf-8',
+              header=[c.removesuffix('.1') for c in df.columns])
+
+
+@pytest.fixture
+def pasta(tmp_path):
+    escrever_cnm(tmp_path, [
+        ('111.444.777-35', 'INCLUSAO', '10/01/2024 08:30:00'),
+        ('111.444.777-35', 'EXCLUSAO', '11/01/2024 09:00:00'),   # duplicado: a primeira linha vence
+        ('52998224725', 'EXCLUSAO', '05/02/2024 14:15:00'),
+        ('11.222.333/0001-81', 'INCLUSAO', '20/03/2024 10:00:00'),
+        ('01234567890', 'OUTRO', '01/04/2024 00:00:00'),          # zero à esquerda e Tipo fora do padrão
+    ])
+    escrever_sgp(tmp_path, ['111.444.777-35', '11.222.333/0001-81', '11.222.333/0001-81', '98765432100',
+                            '39053344705'])
+    return tmp_path
+
+
+def test_conciliacao_igual_a_original(pasta):
+    escrever_soa(pasta, 'Ativas', [
+        ('U1', '529.982.247-25', 'Maria', '01/02/2024 00:00'),
+        ('', '390.533.447-05', 'João', '02/02/2024 00:00'),        # sem ID na primeira linha...
+        ('U3', '390.533.447-05', 'João', '03/02/2024 00:00'),      # ...mas com ID na seguinte
+        ('', '123.456.789-09', 'Ana', '04/02/2024 00:00'),         # sem ID em nenhuma linha
+    ])
+    escrever_soa(pasta, 'Baixadas', [
+        ('U4', '123.456.789-09', 'Ana (baixada)', '05/02/2024 00:00'),  # repetido em outra fonte
+        ('U5', '987.654.321-00', 'Pedro', '06/02/2024 00:00'),
+    ])
+    obtido = comparar(pasta).set_index('Documento')
+    assert len(obtido) == 7
+    assert obtido.loc['11144477735', 'Tipo'] == 'INCLUSAO'
+    assert obtido.loc['01234567890', 'Status'] == 'ERRO'
+    assert obtido.loc['52998224725', 'ID'] == 'U1'
+
+
+def test_documentos_vizinhos_com_id(pasta):
+    # Chaves a menos de 128 uma da outra colidiam ao passar por float64 e o
+    # primeiro Unique ID do segundo documento era descartado
+    escrever_soa(pasta, 'Ativas', [
+        ('U1', '529.982.247-25', 'Maria', '01/02/2024 00:00'),
+        ('', '529.982.248-06', 'José', '02/02/2024 00:00'),
+        ('U2', '529.982.248-06', 'José', '03/02/2024 00:00'),
+        ('U3', '529.982.248-06', 'José', '04/02/2024 00:00'),
+    ])
+    obtido = comparar(pasta).set_index('Documento')
+    assert obtido.loc['52998224725', 'ID'] == 'U1'
+    assert obtido.loc['52998224806', 'ID'] != '-'
+
+
+def test_sem_nenhum_csv_do_soa(pasta):
+    obtido = comparar(pasta)
+    assert (obtido['Nome'] == '-').all()
+    assert (obtido['ID'] == '-').all()
+
+
+def test_soa_sem_linhas(pasta):
+    escrever_soa(pasta, 'Erros', [])
+    comparar(pasta)
+
+
+def test_dados_sinteticos(tmp_path):
+    # taxa_erro=0: o laço original quebra com datas ilegíveis e Tipos vazios
+    gerar_dados_sinteticos(str(tmp_path), 400, taxa_erro=0, semente=7)
+    esperado = conciliar_original(*carregar_original(tmp_path))
+    # Única diferença intencional: datas do SOA saem no mesmo formato das do CNM
+    so_dia = esperado['Data'].astype(str).str.fullmatch(r'\d{2}/\d{2}/\d{4}')
+    esperado.loc[so_dia, 'Data'] = esperado.loc[so_dia, 'Data'] + ' 00:00'
+    obtido = comparar(tmp_path, esperado)
+    assert obtido['ID'].isna().any() or (obtido['ID'] == '-').any()
+    assert np.isin(['NEGATIVADO', 'BAIXADO', 'ERRO'], obtido['Status']).all()
@@ -0,0 +1,161 @@
+import html
+import os
+import re
+import numpy as np
+import pandas as pd
+from chave_documento import desempacotar_documentos
+from datas import formatar_datas
+from escritores import escrever_excel, escrever_tabela_html, sem_renderizar, substituir_ao_final
+
+# Visões pareadas de auditoria (antes em gerar_dashboards_OLD.py), derivadas
+# da mesma junção por documento usada na visão unificada (juntar_fontes),
+# sem reler as planilhas. As regras de status são as das visões antigas.
+
+COLUNAS_CNM_SGP = ["Id", "Documento", "Nome", "Data", "Tipo", "Local", "Status"]
+COLUNAS_SOA_SGP = ["ID", "Documento", "Nome", "Data Inclusão", "Local", "Tipo", "Status"]
+
+VISOES = {
+    'cnm_sgp': 'Dashboard CNM x SGP',
+    'soa_sgp': 'Dashboard SOA x SGP'
+}
+
+
+def _local(origem_a, presente_a, origem_b, presente_b):
+    def span(origem, presente):
+        return np.where(presente, f"<span style='color:green'>{origem}</span>",
+                        f"<span style='color:red'>{origem}</span>").astype(object)
+    return span(origem_a, presente_a) + " | " + span(origem_b, presente_b)
+
+
+def _coluna(juncao, fonte, coluna, vazio):
+    if coluna not in juncao[fonte]:
+        return np.full(len(juncao), vazio, dtype=object)
+    valores = juncao[(fonte, coluna)].astype(object)
+    return valores.where(valores.notna(), vazio).to_numpy(dtype=object)
+
+
+def _texto_soa(juncao, coluna, vazio, remover=None):
+    # Como em comparar_soa_sgp: entidades HTML do CSV do SOA decodificadas e,
+    # no Unique ID, sem os caracteres fora de \w
+    if coluna not in juncao['ativas']:
+        return np.full(len(juncao), vazio, dtype=object)
+    def normalizar(valor):
+        texto = html.unescape(str(valor))
+        return texto if remover is None else re.sub(remover, '', texto)
+    valores = juncao[('ativas', coluna)].map(normalizar, na_action='ignore')
+    return valores.astype(object).where(valores.notna(), vazio).to_numpy(dtype=object)
+
+
+def visao_cnm_sgp(juncao):
+    juncao = juncao[juncao[('presente', 'cnm')] | juncao[('presente', 'sgp')]]
+    presente_cnm = juncao[('presente', 'cnm')].to_numpy()
+    presente_sgp = juncao[('presente', 'sgp')].to_numpy()
+    tipo = _coluna(juncao, 'cnm', 'Tipo', "")
+    status = np.select(
+        [presente_cnm & (tipo == 'INCLUSAO') & presente_sgp,
+         presente_cnm & (tipo == 'EXCLUSAO') & ~presente_sgp],
+        ['NEGATIVADO', 'BAIXADO'], 'ERRO')
+    return pd.DataFrame({
+        "Id": _coluna(juncao, 'cnm', 'Id', ""),
+        "Documento": desempacotar_documentos(juncao.index.to_numpy()),
+        "Nome": _coluna(juncao, 'sgp', 'Nome/Razão Social', ""),
+        "Data": formatar_datas(juncao[('cnm', 'Data / Hora')], vazio=""),
+        "Tipo": tipo,
+        "Local": _local('CNM', presente_cnm, 'SGP', presente_sgp),
+        "Status": status
+    }, columns=COLUNAS_CNM_SGP)
+
+
+def visao_soa_sgp(juncao):
+    # Só a fonte Ativas do SOA, como na visão antiga
+    juncao = juncao[juncao[('presente', 'ativas')] | juncao[('presente', 'sgp')]]
+    presente_soa = juncao[('presente', 'ativas')].to_numpy()
+    presente_sgp = juncao[('presente', 'sgp')].to_numpy()
+    ambos = presente_soa & presente_sgp
+    nome = np.where(presente_soa, _texto_soa(juncao, 'devedor', "-"),
+                    _coluna(juncao, 'sgp', 'Nome/Razão Social', "-"))
+    data = (formatar_datas(juncao[('ativas', 'data')], formato='%d/%m/%Y') if 'data' in juncao['ativas']
+            else np.full(len(juncao), "-", dtype=object))
+    return pd.DataFrame({
+        "ID": _texto_soa(juncao, 'Unique ID', "-", remover=r'\W'),
+        "Documento": desempacotar_documentos(juncao.index.to_numpy()),
+        "Nome": nome,
+        "Data Inclusão": data,
+        "Local": _local('SOA', presente_soa, 'SGP', presente_sgp),
+        "Tipo": np.where(ambos, "INCLUSÃO", "ERRO"),
+        "Status": np.where(ambos, "NEGATIVADO", "ERRO")
+    }, columns=COLUNAS_SOA_SGP)
+
+
+def gerar_html_visao(df, caminho, titulo):
+    subtitulos = {
+        "NEGATIVADO": "Relação de clientes que estão negativados nas duas planilhas.",
+        "BAIXADO": "Relação de clientes que estão baixados nas duas planilhas..",
+        "ERRO": "Relação de clientes que não estão presentes em uma das planilhas."
+    }
+    opcoes = ''.join(f'<option value="{html.escape(s)}">{html.escape(s)} ({n})</option>'
+                     for s, n in sorted(df['Status'].value_counts().items()))
+    with substituir_ao_final(caminho) as temporario, open(temporario, 'w', encoding='utf-8') as f:
+        f.write(f"""<!DOCTYPE html>
+<html lang='pt-BR'>
+<head>
+    <meta charset='UTF-8'><title>{titulo}</title>
+    <link rel='stylesheet' href='https://cdn.datatables.net/1.13.4/css/jquery.dataTables.min.css'>
+    <script src='https://code.jquery.com/jquery-3.7.0.min.js'></script>
+    <script src='https://cdn.datatables.net/1.13.4/js/jquery.dataTables.min.js'></script>
+    <style>
+        body {{ font-family: Arial; text-align: center; }}
+        table {{ margin: 0 auto; width: 90%; }}
+        .subtitulo {{ margin: 10px 0; font-weight: bold; }}
+    </style>
+</head>
+<body>
+    <h2>{titulo}</h2>
+    <div class='subtitulo' id='subtitulo'></div>
+""")
+        escrever_tabela_html(f, df, renderizar=sem_renderizar)
+        f.write(f"""    <footer>VERDE = Presente | VERMELHO = Ausente</footer>
+    <script>
+        const subtitulos = {{
+            "NEGATIVADO": "{subtitulos['NEGATIVADO']}",
+            "BAIXADO": "{subtitulos['BAIXADO']}",
+            "ERRO": "{subtitulos['ERRO']}"
+        }};
+        $(document).ready(function() {{
+            const table = $('#tabela').DataTable({{
+                paging: true,
+                searching: true,
+                ordering: true,
+                pageLength: 25,
+                language: {{
+                    url: '//cdn.datatables.net/plug-ins/1.13.4/i18n/pt-BR.json'
+                }},
+                initComplete: function () {{
+                    const column = this.api().column(-1);
+                    $('<select><option value="">Filtrar por Status</option>{opcoes}</select>')
+                        .appendTo($(column.header()).empty())
+                        .on('click', function (e) {{ e.stopPropagation(); }})
+                        .on('change', function () {{
+                            const val = $.fn.dataTable.util.escapeRegex($(this).val());
+                            column.search(val ? '^' + val + '$' : '', true, false).draw();
+                        }});
+                }}
+            }});
+            table.on('search.dt', function () {{
+                const val = table.column(-1, {{search: 'applied'}}).data()[0];
+                $('#subtitulo').html(subtitulos[val] || '');
+            }});
+        }});
+    </script>
+</body>
+</html>""")
+
+
+def gerar_visoes(juncao, saida_dir):
+    # Monta e grava as duas visões pareadas; devolve os quadros por nome
+    quadros = {'cnm_sgp': visao_cnm_sgp(juncao), 'soa_sgp': visao_soa_sgp(juncao)}
+    for nome, df in quadros.items():
+        escrever_excel(df, os.path.join(saida_dir, f'resultado_{nome}.xlsx'), renderizar=sem_renderizar)
+        gerar_html_visao(df, os.path.join(saida_dir, f'dashboard_{nome}.html'), VISOES[nome])
+        print(f'[INFO] {VISOES[nome]}: {len(df)} documentos.')
+    return quadros